@@ -52,6 +52,8 @@ INSTALLED_APPS = [
     'reviewapp',
     'commentapp',
     'payapp',
+    'idempotencyapp',
+    'jobapp',
     'rest_framework',
     'rest_framework_simplejwt',
 ]
@@ -104,6 +106,29 @@ DATABASES = {
 
 django_heroku.settings(locals())
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+#
+# "default" is a per-worker LRU cache for rendered data, "shared" is visible to every worker and
+# only holds small version/generation counters used to invalidate "default" (see utils/cache.py).
+# The shared table is created with `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'aether-local',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'aether_shared_cache',
+        'TIMEOUT': None,
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -146,10 +171,67 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Product views are buffered per worker and flushed in the background (productapp.view_counter).
+# At most this many seconds / pending views can be lost if a worker is killed.
+PRODUCT_VIEWS_FLUSH_INTERVAL = 10
+PRODUCT_VIEWS_MAX_PENDING = 1000
+# Without the background thread (e.g. in tests) views are written once MAX_PENDING of them
+# are buffered, on exit, or by calling view_counter.flush_views.
+PRODUCT_VIEWS_FLUSH_THREAD = True
+
+# Default page size of the keyset-paginated product listings, and the number of rows fetched
+# per server-side cursor round trip when a seller's catalog is streamed.
+PRODUCT_PAGE_SIZE = 30
+PRODUCT_STREAM_CHUNK_SIZE = 500
+
+# Seconds a worker serves its in-memory copy of order statuses and categories before checking
+# the shared cache for a newer version (utils.reference_cache).
+REFERENCE_CACHE_CHECK_INTERVAL = 5
+
+# Seconds a stored Idempotency-Key response is kept (python manage.py sweep_idempotency_keys).
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Default page size of the buyer and seller order feeds (OrderList.get).
+ORDER_PAGE_SIZE = 30
+
+# Default page size of the payment history and rows fetched per round trip by the streamed
+# account statement.
+PAYMENT_PAGE_SIZE = 30
+PAYMENT_STATEMENT_CHUNK_SIZE = 1000
+
+# Where python manage.py archive_orders writes the monthly order archives.
+ORDER_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Background job queue (jobapp, python manage.py run_jobs): jobs claimed per batch, seconds a
+# claimed job is leased to a worker, attempts before a job is marked failed, base of the
+# exponential retry delay in seconds and how often an idle worker polls for due jobs.
+JOB_BATCH_SIZE = 10
+JOB_LEASE = 5 * 60
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 10
+JOB_POLL_INTERVAL = 1
+
+# Pending seller settlements credited per transaction by python manage.py settle_sellers.
+SELLER_SETTLEMENT_BATCH_SIZE = 1000
+
+# Lower edges of the price histogram returned by the product listing with ?facets=true.
+PRODUCT_PRICE_BUCKETS = [0, 10, 50, 100, 500, 1000, 5000]
+
+# Rows validated and inserted together by the bulk product import.
+PRODUCT_IMPORT_BATCH_SIZE = 500
+
+# Bounding boxes of the thumbnails generated for every product image (JPEG + WebP each).
+PRODUCT_IMAGE_RENDITIONS = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'utils.authentication.ProfileJWTAuthentication',
+    ),
+    # Decimal balances stay JSON numbers, as they were when they were floats.
+    'COERCE_DECIMAL_TO_STRING': False,
 }
 
 
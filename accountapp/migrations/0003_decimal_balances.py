@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:07
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('12100.09'), max_digits=14),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.db import models
 from userapp.models import UserProfile
 
@@ -5,7 +7,8 @@ from userapp.models import UserProfile
 class Account(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     account_number = models.CharField(unique=True)
-    balance = models.FloatField(default=12100.09)
+    # Exact to the cent, changed only through payapp.ledger
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('12100.09'))
     is_deleted = models.BooleanField(default=False)
 
     def __str__(self):
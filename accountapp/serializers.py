@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from accountapp.models import *
 
@@ -9,3 +11,18 @@ class AccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Account
         fields = '__all__'
+
+
+class AccountFillSerializer(serializers.Serializer):
+    fill = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class TopUpCreditSerializer(serializers.Serializer):
+    account = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class BatchTopUpSerializer(serializers.Serializer):
+    credits = TopUpCreditSerializer(many=True, allow_empty=False, max_length=1000)
+    reference = serializers.CharField(max_length=50, required=False, allow_blank=True, default='',
+                                      help_text="What the credits are for, e.g. refund:123")
@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.AccountList.as_view(), name='Account_list'),
+    path('top_up/', views.AccountTopUp.as_view(), name='Account_top_up'),
     path('<int:_id>/', views.AccountDetails.as_view(), name='Account_detail'),
 ]
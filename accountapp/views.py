@@ -1,24 +1,25 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions
 from drf_yasg import openapi
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 import logging
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
-from utils.tokens import get_user_id_from_token
+from utils.tokens import get_user_profile
 from .models import (UserProfile,
                      Account
                      )
-from .serializers import AccountSerializer
+from payapp.ledger import top_up
+from .serializers import AccountFillSerializer, AccountSerializer, BatchTopUpSerializer
 
 
 logger = logging.getLogger('accountapp.views')
 
 
 class AccountList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -29,18 +30,17 @@ class AccountList(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
         try:
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             accounts = Account.objects.filter(user=user_profile, is_deleted=False)
         except Account.DoesNotExist:
-            logger.warning(f"Failed to retrieve accounts for user {user_id}. Account Not Found.")
+            logger.warning(f"Failed to retrieve accounts for user {request.user.id}. Account Not Found.")
             return Response({"message": "Account Not Found."}, status=404)
         if not accounts.exists():
-            logger.warning(f"Failed to retrieve accounts for user {user_id}. Account Not Found.")
+            logger.warning(f"Failed to retrieve accounts for user {request.user.id}. Account Not Found.")
             return Response({"message": "You have not any accounts."}, status=404)
         serializer = AccountSerializer(accounts, many=True)
-        logger.info(f"User with ID {user_id} retrieved their accounts.")
+        logger.info(f"User with ID {request.user.id} retrieved their accounts.")
         return Response(serializer.data, status=200)
 
     @swagger_auto_schema(
@@ -61,17 +61,16 @@ class AccountList(APIView):
     def post(self, request):
         serializer = AccountSerializer(data=request.data)
         if serializer.is_valid():
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             serializer.save(user=user_profile)
-            logger.info(f"New account created with ID {serializer.data.get('id')} for user {user_id}.")
+            logger.info(f"New account created with ID {serializer.data.get('id')} for user {request.user.id}.")
             return Response({"message": "Account created successfully"}, status=200)
         logger.error(f"Failed to create a new account: {serializer.errors}")
         return Response(serializer.errors, status=401)
 
 
 class AccountDetails(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -82,16 +81,15 @@ class AccountDetails(APIView):
         security=[],
     )
     def get_object(self, request, _id):
-        user_id = get_user_id_from_token(request)
         try:
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             account = get_object_or_404(Account, user=user_profile, id=_id, is_deleted=False)
             return account
         except UserProfile.DoesNotExist:
-            logger.warning(f"User profile not found for user with ID {user_id}.")
+            logger.warning(f"User profile not found for user with ID {request.user.id}.")
             raise Http404({"message": "User profile not found"})
         except Account.DoesNotExist:
-            logger.warning(f"Account not found with ID {_id} for user with ID {user_id}.")
+            logger.warning(f"Account not found with ID {_id} for user with ID {request.user.id}.")
             raise Http404({"message": "Account not found"})
         except Exception as e:
             logger.error(f"An error occurred while processing the request: {str(e)}")
@@ -133,7 +131,6 @@ class AccountDetails(APIView):
     def put(self, request, _id):
         try:
             account = self.get_object(request, _id)
-            serializer = AccountSerializer(account, data=request.data, partial=True)  # Use data=request.data
         except Http404:
             logger.warning(f"Failed to retrieve account with ID {_id}. Account not found.")
             return Response({"message": "Account Not Found"}, status=404)
@@ -141,19 +138,24 @@ class AccountDetails(APIView):
             logger.error(f"An error occurred while processing the request: {str(e)}")
             return Response({"error": str(e)}, status=500)
 
-        fill = request.data.get('fill')
-        if not isinstance(fill, (int, float)):
-            return Response({"warning": "Invalid fill value. It should be a number."}, status=401)
-        elif fill < 10000:
-            serializer.is_valid(raise_exception=True)  # Validate the serializer
-            account.balance += fill
-            account.save()
-            logger.info(f"Account with ID {_id} balance updated successfully\n\tdata: {serializer.data}.")
-            return Response(serializer.data, status=200)
-        else:
+        fill_serializer = AccountFillSerializer(data=request.data)
+        if not fill_serializer.is_valid():
+            return Response({"warning": "Invalid fill value. It should be a positive number."}, status=401)
+        fill = fill_serializer.validated_data['fill']
+        if fill >= 10000:
             logger.warning(f"Failed to update account with ID {_id}. Fill value is too high.")
             return Response({"warning": "Fill value is too high. Maximum allowed is 10000."}, status=401)
 
+        # One UPDATE ... RETURNING: concurrent top-ups add up instead of overwriting each other.
+        balances = top_up([(account.id, fill)], reference=f'account:{account.id}', user_id=account.user_id)
+        if account.id not in balances:
+            logger.warning(f"Failed to update account with ID {_id}. Account not found.")
+            return Response({"message": "Account Not Found"}, status=404)
+        account.balance = balances[account.id]
+        serializer = AccountSerializer(account)
+        logger.info(f"Account with ID {_id} balance updated successfully\n\tdata: {serializer.data}.")
+        return Response(serializer.data, status=200)
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
@@ -175,3 +177,31 @@ class AccountDetails(APIView):
         account.save()
         logger.info(f"Account with ID {_id} marked as deleted.")
         return Response({"message": "Account has been successfully removed."}, status=200)
+
+
+class AccountTopUp(APIView):
+    authentication_classes = [ProfileJWTAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        request_body=BatchTopUpSerializer,
+        security=[],
+    )
+    def post(self, request):
+        """Credits many accounts at once (refunds, promotions). Staff only."""
+        serializer = BatchTopUpSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        credits = serializer.validated_data['credits']
+        reference = serializer.validated_data['reference']
+
+        balances = top_up([(credit['account'], credit['amount']) for credit in credits], reference=reference)
+        skipped = sorted({credit['account'] for credit in credits} - set(balances))
+        logger.info(f"User with ID {request.user.id} topped up {len(balances)} accounts ({reference}).")
+        return Response({
+            "credited": [{"account": account_id, "balance": balance} for account_id, balance in sorted(balances.items())],
+            "skipped": skipped,
+        }, status=200)
@@ -3,19 +3,19 @@ from rest_framework import permissions
 from drf_yasg import openapi
 import logging
 from .serializers import *
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
-from utils.tokens import get_user_id_from_token
+from utils.tokens import get_user_profile
 
 
 logger = logging.getLogger('addressapp.views')
 
 
 class AddressList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -26,8 +26,7 @@ class AddressList(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
         try:
             address = Address.objects.filter(user=user_profile, is_deleted=False)
             serializer = AddressSerializer(address, many=True)
@@ -53,10 +52,9 @@ class AddressList(APIView):
     def post(self, request):
         serializer = AddressSerializer(data=request.data)
         if serializer.is_valid():
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             serializer.save(user=user_profile)
-            logger.info(f"New address created with ID {serializer.data.get('id')} for user {user_id}.")
+            logger.info(f"New address created with ID {serializer.data.get('id')} for user {request.user.id}.")
             return Response(serializer.data, status=200)
         else:
             logger.error(f"Failed to create a new address: {serializer.errors}")
@@ -64,12 +62,11 @@ class AddressList(APIView):
 
 
 class AddressDetails(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self, request, _id):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
         return get_object_or_404(Address, user=user_profile, id=_id, is_deleted=False)
 
     @swagger_auto_schema(
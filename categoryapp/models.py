@@ -5,6 +5,7 @@ class Category(models.Model):
     category_name = models.CharField(max_length=100)
     category = models.IntegerField(null=True)
     description = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.category_name
@@ -7,6 +7,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from productapp.serializers import CategorySerializer
+from utils.conditional import conditional_response, make_etag, set_validators
+from utils.reference_cache import categories
 
 
 logger = logging.getLogger('categoryapp.views')
@@ -14,9 +16,15 @@ logger = logging.getLogger('categoryapp.views')
 
 class CategoryList(APIView):
     def get(self, request):
-        category = Category.objects.all()
+        category = categories.all()
+        etag = make_etag('categories', categories.version)
+        updated_at = max((row.updated_at for row in category), default=None)
+        response = conditional_response(request, etag, updated_at)
+        if response is not None:
+            return response
+
         serializer = CategorySerializer(category, many=True)
-        return Response(serializer.data, status=200)
+        return set_validators(Response(serializer.data, status=200), etag, updated_at)
 
     @swagger_auto_schema(
         request_body=openapi.Schema(
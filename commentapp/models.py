@@ -8,3 +8,4 @@ class Comment(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     parent_id = models.IntegerField(null=True)
     comment_text = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
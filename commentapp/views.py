@@ -4,16 +4,18 @@ from drf_yasg import openapi
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny
 from django.db import transaction
+from django.db.models import Count, Max
 from .serializers import *
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 import logging
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from utils.tokens import get_user_id_from_token
+from utils.tokens import get_user_profile
 from utils.commentTree import build_comment_tree
+from utils.conditional import conditional_response, make_etag, set_validators
 
 logger = logging.getLogger('commentapp.views')
 
@@ -44,9 +46,18 @@ class CommentList(APIView):
 
     def get(self, request, product_id):
         try:
+            # The count catches deletions, which leave no newer updated_at behind.
+            version = Comment.objects.filter(product_id=product_id).aggregate(
+                updated_at=Max('updated_at'), count=Count('id'))
+            etag = make_etag(product_id, version['updated_at'], version['count'])
+            response = conditional_response(request, etag, version['updated_at'])
+            if response is not None:
+                return response
+
             main_comments, comments_dict = self.get_object(product_id)
             main_comments_tree = [build_comment_tree(comment, comments_dict) for comment in main_comments]
-            return Response(main_comments_tree, status=status.HTTP_200_OK)
+            return set_validators(Response(main_comments_tree, status=status.HTTP_200_OK), etag,
+                                  version['updated_at'])
         except Exception as e:
             logger.error(f"An error occurred while processing the request: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -68,8 +79,7 @@ class CommentList(APIView):
     )
     def post(self, request, product_id):
         try:
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             serializer = CommentSerializer(data=request.data)
             if serializer.is_valid():
                 parent_comment_id = request.data.get('parent_id')
@@ -95,7 +105,7 @@ class CommentList(APIView):
 
 
 class CommentDetail(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self, _comment_id):
@@ -125,8 +135,7 @@ class CommentDetail(APIView):
     )
     def delete(self, request, comment_id):
         try:
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             comment = Comment.objects.get(id=comment_id, user=user_profile)
             logger.info(f"Attempting to delete comment with ID {comment_id}.")
         except Comment.DoesNotExist:
@@ -1,7 +1,7 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 from rest_framework import permissions
 from drf_yasg import openapi
 
@@ -11,7 +11,7 @@ from featured_productapp.models import FeaturedProduct
 from featured_productapp.serializers import FeaturesProductSerializer
 from productapp.models import Product
 from drf_yasg.utils import swagger_auto_schema
-from utils.tokens import get_user_id_from_token
+from utils.tokens import get_user_profile
 from userapp.models import UserProfile
 
 
@@ -19,7 +19,7 @@ logger = logging.getLogger('featured_productapp.views')
 
 
 class FeaturedProductsList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -30,8 +30,7 @@ class FeaturedProductsList(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
-        user = UserProfile.objects.get(id=user_id)
+        user = get_user_profile(request)
         featured_products = FeaturedProduct.objects.filter(user=user, is_deleted=False)
         serializer = FeaturesProductSerializer(featured_products, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -53,10 +52,9 @@ class FeaturedProductsList(APIView):
     def post(self, request):
         try:
             product_id = request.data.get("product")
-            user_id = get_user_id_from_token(request)
 
             try:
-                user = UserProfile.objects.get(id=user_id)
+                user = get_user_profile(request)
             except UserProfile.DoesNotExist:
                 return Response(data={"message": "User does not exist."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -85,7 +83,7 @@ class FeaturedProductsList(APIView):
 
 
 class FeaturedProductDetail(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -96,8 +94,7 @@ class FeaturedProductDetail(APIView):
         security=[],
     )
     def delete(self, request, pk):
-        user_id = get_user_id_from_token(request)
-        user = UserProfile.objects.get(id=user_id)
+        user = get_user_profile(request)
         try:
             featured_product = FeaturedProduct.objects.get(id=pk, user=user, is_deleted=False)
         except FeaturedProduct.DoesNotExist:
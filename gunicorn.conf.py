@@ -0,0 +1,7 @@
+# Picked up automatically by gunicorn (see Procfile).
+
+
+def worker_exit(server, worker):
+    from productapp.view_counter import flush_views
+
+    flush_views()
@@ -0,0 +1,93 @@
+"""
+Idempotency-Key support for write endpoints.
+
+The first request with a given key inserts its ``IdempotencyKey`` row and runs the view in
+the same transaction, then stores the response on the row before committing. A retry with
+the same key gets the stored response back. A duplicate that arrives while the first
+request is still running blocks on the row's unique index until the first commits, and then
+gets its response too. If the first request fails (an exception or a 5xx) its row is
+rolled back with everything else, and the next attempt runs the request again.
+"""
+import functools
+import hashlib
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from drf_yasg import openapi
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger('idempotencyapp.idempotency')
+
+HEADER = 'Idempotency-Key'
+
+idempotency_key_parameter = openapi.Parameter(
+    HEADER, openapi.IN_HEADER, type=openapi.TYPE_STRING, required=False,
+    description="Unique key per logical request, retries with the same key get the first response back "
+                "instead of running again",
+)
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+
+def stored_body(data):
+    # Encoded the way the API renders it, so e.g. Decimals replay as the numbers the first
+    # response had rather than as DjangoJSONEncoder's strings.
+    if data is None:
+        return None
+    return json.loads(JSONRenderer().render(data))
+
+
+def replay(user_id, key, fingerprint):
+    stored = IdempotencyKey.objects.filter(user_id=user_id, key=key).first()
+    if stored is None:
+        # Swept between the conflict and this read.
+        return Response({"message": "Request with this Idempotency-Key is being replaced, retry."}, status=409)
+    if stored.request_hash != fingerprint:
+        return Response({"message": "Idempotency-Key was already used for a different request."}, status=422)
+
+    logger.info(f"Replaying stored response for Idempotency-Key {key} of user with ID {user_id}.")
+    response = Response(stored.response_body, status=stored.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """Makes an APIView handler honour the Idempotency-Key header. Requests without it run as before."""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        # The decorated views authenticate with ProfileJWTAuthentication, so this is the token's user.
+        user_id = request.user.id
+        if not key or user_id is None:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"message": f"{HEADER} must be at most 255 characters."}, status=400)
+
+        fingerprint = request_hash(request)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    claim = IdempotencyKey.objects.create(user_id=user_id, key=key, request_hash=fingerprint,
+                                                          status_code=0)
+            except IntegrityError:
+                return replay(user_id, key, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+
+            claim.status_code = response.status_code
+            claim.response_body = stored_body(getattr(response, 'data', None))
+            claim.save(update_fields=['status_code', 'response_body'])
+            return response
+
+    return wrapper
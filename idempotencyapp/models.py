@@ -0,0 +1,21 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from userapp.models import UserProfile
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # SHA-256 of method, path and body: a key can't be reused for a different request
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_user_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
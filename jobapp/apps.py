@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobApp(AppConfig):
+    name = 'jobapp'
+
+    def ready(self):
+        # Registers the @task functions of every app's tasks.py.
+        autodiscover_modules('tasks')
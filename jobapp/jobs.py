@@ -0,0 +1,101 @@
+"""
+PostgreSQL-backed job queue.
+
+Views enqueue work with ``enqueue``; the row is written in the caller's transaction, so a
+job exists exactly when the change that needs it commits. ``python manage.py run_jobs``
+claims due jobs in batches with ``FOR UPDATE SKIP LOCKED`` (workers never wait on each
+other) and runs each one in its own transaction that also deletes the job row: database
+work done by a task is applied once even if the task is retried. A failed job is retried
+with exponential backoff until it runs out of attempts and is left as ``failed``.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('jobapp.jobs')
+
+_tasks = {}
+
+
+def task(name):
+    """Registers a function as the handler of ``name`` jobs. Payload items are passed as keyword arguments."""
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def _job(name, payload, priority, delay):
+    if name not in _tasks:
+        raise ValueError(f"Unknown job task {name}.")
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else timezone.now()
+    return Job(task=name, payload=payload, priority=priority, run_at=run_at, max_attempts=settings.JOB_MAX_ATTEMPTS)
+
+
+def enqueue(name, priority=0, delay=None, **payload):
+    job = _job(name, payload, priority, delay)
+    job.save()
+    return job
+
+
+def enqueue_many(name, payloads, priority=0, delay=None):
+    return Job.objects.bulk_create([_job(name, payload, priority, delay) for payload in payloads])
+
+
+@transaction.atomic
+def claim_jobs(limit):
+    """Leases up to ``limit`` due jobs to this worker for JOB_LEASE seconds."""
+    now = timezone.now()
+    jobs = list(Job.objects.select_for_update(skip_locked=True)
+                .filter(status__in=[Job.QUEUED, Job.RUNNING], run_at__lte=now)
+                .order_by('-priority', 'run_at')[:limit])
+    if not jobs:
+        return []
+
+    lease_until = now + timedelta(seconds=settings.JOB_LEASE)
+    Job.objects.filter(id__in=[job.id for job in jobs]).update(status=Job.RUNNING, run_at=lease_until,
+                                                               attempts=F('attempts') + 1)
+    for job in jobs:
+        job.status = Job.RUNNING
+        job.run_at = lease_until
+        job.attempts += 1
+    return jobs
+
+
+def _claimed(job):
+    # Still ours: a worker whose lease expired finds the job re-claimed with more attempts.
+    return Job.objects.filter(id=job.id, status=Job.RUNNING, attempts=job.attempts)
+
+
+def run_job(job):
+    """Runs a claimed job. Returns True if it completed."""
+    try:
+        with transaction.atomic():
+            if not _claimed(job).delete()[0]:
+                logger.warning(f"Skipped job {job}: its lease expired and it was claimed again.")
+                return False
+            _tasks[job.task](**job.payload)
+        return True
+    except Exception as e:
+        logger.error(f"Job {job} failed on attempt {job.attempts}: {str(e)}")
+        if job.attempts >= job.max_attempts:
+            _claimed(job).update(status=Job.FAILED, last_error=str(e))
+        else:
+            delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            _claimed(job).update(status=Job.QUEUED, run_at=timezone.now() + timedelta(seconds=delay),
+                                 last_error=str(e))
+        return False
+
+
+def retry_failed(task_name=None):
+    """Puts failed jobs back in the queue with a fresh set of attempts."""
+    jobs = Job.objects.filter(status=Job.FAILED)
+    if task_name:
+        jobs = jobs.filter(task=task_name)
+    return jobs.update(status=Job.QUEUED, run_at=timezone.now(), attempts=0)
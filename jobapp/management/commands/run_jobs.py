@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobapp.jobs import claim_jobs, retry_failed, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs. Start as many workers as needed, they never take the same job."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.JOB_BATCH_SIZE, help="Jobs claimed at a time")
+        parser.add_argument('--once', action='store_true', help="Exit when no job is due instead of polling")
+        parser.add_argument('--retry-failed', action='store_true', help="Requeue failed jobs before starting")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f"Requeued {retry_failed()} failed jobs.")
+
+        done = failed = 0
+        while True:
+            close_old_connections()
+            jobs = claim_jobs(options['batch_size'])
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(settings.JOB_POLL_INTERVAL)
+                continue
+
+            for job in jobs:
+                if run_job(job):
+                    done += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {done} jobs, {failed} failed or skipped."))
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import OrderDetails, OrderStatus
+from .models import Basket, OrderDetails, OrderStatus
 
 admin.site.register(OrderStatus)
+admin.site.register(Basket)
 admin.site.register(OrderDetails)
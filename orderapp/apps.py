@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class MyAppConfig(AppConfig):
     name = 'orderapp'
+
+    def ready(self):
+        # Connects the reference cache's invalidation signals in every process, not only in
+        # the ones that happen to import a view using it.
+        import utils.reference_cache  # noqa: F401
@@ -0,0 +1,70 @@
+"""
+Multi-line checkout: a whole basket is validated, stocked and written in one transaction.
+"""
+from django.db import transaction
+
+from payapp.ledger import to_money
+from productapp.cache import invalidate_product_listings
+from productapp.models import Product
+from productapp.stock import take_stock
+
+from utils.reference_cache import get_order_status
+
+from .models import Basket, Order, OrderDetails
+
+
+class CheckoutError(Exception):
+    def __init__(self, errors, status=400):
+        super().__init__(errors)
+        self.errors = errors
+        self.status = status
+
+
+def merge_lines(lines):
+    """Sums the quantities of lines that repeat a product, keyed and ordered by product ID."""
+    quantities = {}
+    for line in lines:
+        quantities[line['product']] = quantities.get(line['product'], 0) + line['quantity']
+    return dict(sorted(quantities.items()))
+
+
+@transaction.atomic
+def checkout_basket(user_profile, address, lines):
+    quantities = merge_lines(lines)
+    products = Product.objects.in_bulk(quantities)
+
+    missing = [product_id for product_id in quantities
+               if product_id not in products or products[product_id].is_deleted]
+    if missing:
+        raise CheckoutError({str(product_id): "Product not found." for product_id in missing}, status=404)
+
+    # Stock is taken in product ID order, so two baskets sharing products lock them in the
+    # same order and can't deadlock. Any shortage rolls the whole basket back.
+    shortages = {}
+    for product_id, quantity in quantities.items():
+        if take_stock(products[product_id], quantity) is None:
+            shortages[str(product_id)] = "Insufficient stock."
+    if shortages:
+        raise CheckoutError(shortages, status=401)
+
+    details = [
+        OrderDetails(product=products[product_id], price=products[product_id].price * quantity,
+                     quantity=quantity, address=address, seller_id=products[product_id].user_id)
+        for product_id, quantity in quantities.items()
+    ]
+    # Summed the way the ledger debits it, line by line in money.
+    basket = Basket.objects.create(
+        user=user_profile,
+        status=get_order_status('created'),
+        address=address,
+        total_price=sum(to_money(order_details.price) for order_details in details),
+    )
+    details = OrderDetails.objects.bulk_create(details)
+    Order.objects.bulk_create([
+        Order(user=user_profile, status=basket.status, order_details=order_details, basket=basket)
+        for order_details in details
+    ])
+
+    for shop_id in {product.shop_id for product in products.values()}:
+        invalidate_product_listings(shop_id)
+    return basket
@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from orderapp.models import Order, OrderDetails
+from payapp.models import Payment
+
+
+class Command(BaseCommand):
+    help = ("Move order lines placed before a month that are deleted or fully paid, with their orders and "
+            "payments, to monthly gzip JSON Lines files and delete them from the database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help="YYYY-MM, lines placed before this month are archived")
+        parser.add_argument('--output-dir', default=settings.ORDER_ARCHIVE_DIR)
+        parser.add_argument('--batch-size', type=int, default=1000, help="Order lines moved per transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived")
+
+    def archivable(self, cutoff):
+        orders = Order.objects.filter(order_details=OuterRef('pk'))
+        paid = orders.filter(is_paid=True)
+        unpaid = orders.filter(Q(is_paid=False) | Q(is_paid__isnull=True))
+        # A live line needs a paid order: one without any order (an aborted checkout) isn't settled.
+        return OrderDetails.objects.filter(order_date__lt=cutoff).filter(
+            Q(is_deleted=True) | Exists(paid) & ~Exists(unpaid))
+
+    def write(self, output_dir, records):
+        by_month = defaultdict(list)
+        for record in records:
+            by_month[record['order_details']['order_date'].strftime('%Y_%m')].append(record)
+
+        for month, month_records in by_month.items():
+            path = os.path.join(output_dir, f'orders_{month}.ndjson.gz')
+            # Appending adds a gzip member, gunzip/zcat read the file as one stream.
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for record in month_records:
+                    archive.write(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = timezone.make_aware(datetime.strptime(options['before'], '%Y-%m'))
+        except ValueError:
+            raise CommandError("--before must look like 2023-01.")
+
+        archivable = self.archivable(cutoff)
+        if options['dry_run']:
+            self.stdout.write(f"{archivable.count()} order lines would be archived.")
+            return
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        archived = 0
+        while True:
+            with transaction.atomic():
+                details = list(archivable.order_by('id').values()[:options['batch_size']])
+                if not details:
+                    break
+                ids = [row['id'] for row in details]
+
+                orders = defaultdict(list)
+                for row in Order.objects.filter(order_details_id__in=ids).order_by('id').values():
+                    orders[row['order_details_id']].append(row)
+                payments = defaultdict(list)
+                for row in Payment.objects.filter(order_id__in=ids).order_by('id').values():
+                    payments[row['order_id']].append(row)
+
+                # Written before the delete commits: a failed run can archive a line twice, never lose it.
+                self.write(options['output_dir'], [
+                    {'order_details': row, 'orders': orders[row['id']], 'payments': payments[row['id']]}
+                    for row in details
+                ])
+                Payment.objects.filter(order_id__in=ids).delete()
+                Order.objects.filter(order_details_id__in=ids).delete()
+                OrderDetails.objects.filter(id__in=ids).delete()
+
+            archived += len(ids)
+            self.stdout.write(f"Archived {archived} order lines.")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} order lines placed before {options['before']}."))
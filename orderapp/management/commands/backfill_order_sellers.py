@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import OuterRef, Subquery
+
+from orderapp.models import OrderDetails
+from productapp.models import Product
+
+
+class Command(BaseCommand):
+    help = "Fill OrderDetails.seller from the ordered product's seller, in primary key batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Order details updated per statement")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+        seller = Subquery(Product.objects.filter(id=OuterRef('product_id')).values('user_id')[:1])
+
+        while True:
+            ids = list(OrderDetails.objects.filter(id__gt=last_id, seller__isnull=True)
+                       .order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            updated += OrderDetails.objects.filter(id__in=ids).update(seller=seller)
+            last_id = ids[-1]
+            self.stdout.write(f"Backfilled order details up to ID {last_id} ({updated} total).")
+
+        self.stdout.write(self.style.SUCCESS(f"Seller set on {updated} order details."))
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addressapp', '0002_initial'),
+        ('orderapp', '0002_initial'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Basket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_price', models.FloatField(default=0)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('address', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='addressapp.address')),
+                ('status', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='orderapp.orderstatus')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='baskets', to='userapp.userprofile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='basket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='orderapp.basket'),
+        ),
+    ]
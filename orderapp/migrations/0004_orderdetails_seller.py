@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addressapp', '0002_initial'),
+        ('orderapp', '0003_basket'),
+        ('productapp', '0009_product_stock_shards'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderdetails',
+            name='seller',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sold_order_details', to='userapp.userprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdetails',
+            index=models.Index(fields=['seller', 'is_deleted', 'order_date', 'id'], name='orderdetails_seller_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:56
+
+from django.db import migrations, models
+
+# Statuses the code refers to by name, with the ids they were hard-coded as before.
+STATUSES = [
+    ('created', 1, 'Created'),
+    ('paid', 3, 'Paid'),
+]
+
+
+def add_status_codes(apps, schema_editor):
+    OrderStatus = apps.get_model('orderapp', 'OrderStatus')
+    for code, legacy_id, name in STATUSES:
+        if OrderStatus.objects.filter(id=legacy_id, code__isnull=True).update(code=code):
+            continue
+        if not OrderStatus.objects.filter(code=code).exists():
+            OrderStatus.objects.create(code=code, status_name=name, description=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderapp', '0004_orderdetails_seller'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderstatus',
+            name='code',
+            field=models.SlugField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(add_status_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:58
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('addressapp', '0002_initial'),
+        ('orderapp', '0006_orderstatus_code'),
+        ('productapp', '0009_product_stock_shards'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('is_in_the_card', True)), fields=['user'], name='order_user_in_card_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdetails',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['order_date'], name='orderdetails_order_date_brin'),
+        ),
+    ]
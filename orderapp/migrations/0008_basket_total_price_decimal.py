@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orderapp', '0007_order_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='basket',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from userapp.models import UserProfile
 from productapp.models import (
@@ -11,6 +13,8 @@ from payapp.models import Payment
 
 
 class OrderStatus(models.Model):
+    # Stable name used by the code ("created", "paid"), see utils.reference_cache.get_order_status
+    code = models.SlugField(max_length=50, unique=True, null=True, blank=True)
     status_name = models.CharField(max_length=100)
     description = models.TextField()
 
@@ -25,17 +29,48 @@ class OrderDetails(models.Model):
     is_deleted = models.BooleanField(default=False)
     order_date = models.DateTimeField(default=timezone.now)
     address = models.ForeignKey(Address, on_delete=models.CASCADE)
+    # Copy of product.user taken at order time, so a seller's orders are one index range
+    seller = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='sold_order_details')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['seller', 'is_deleted', 'order_date', 'id'], name='orderdetails_seller_feed_idx'),
+            # Rows are inserted in order_date order, so a BRIN index covers date ranges (archival,
+            # date filters) in a few pages instead of a full B-tree over the whole history.
+            BrinIndex(fields=['order_date'], name='orderdetails_order_date_brin'),
+        ]
 
     def __str__(self):
         return f"{self.product.title} - {self.quantity} units"
 
 
+class Basket(models.Model):
+    user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='baskets')
+    status = models.ForeignKey(OrderStatus, on_delete=models.CASCADE)
+    address = models.ForeignKey(Address, on_delete=models.CASCADE)
+    total_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    is_paid = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Basket {self.id} by {self.user.username}"
+
+
 class Order(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     status = models.ForeignKey(OrderStatus, on_delete=models.CASCADE)
     order_details = models.ForeignKey(OrderDetails, on_delete=models.CASCADE)
+    # Set for the lines of a multi-line checkout, see orderapp.checkout
+    basket = models.ForeignKey(Basket, on_delete=models.CASCADE, null=True, blank=True, related_name='orders')
     is_paid = models.BooleanField(default=False, null=True)
     is_in_the_card = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Active carts only, paid orders leave the index when they leave the cart.
+            models.Index(fields=['user'], name='order_user_in_card_idx', condition=Q(is_in_the_card=True)),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from productapp.serializers import ProductSerializer
-from orderapp.models import (Order,
+from orderapp.models import (Basket,
+                             Order,
                              OrderDetails,
                              OrderStatus,
                              )
@@ -68,3 +69,30 @@ class OrderNewSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderDetails
         fields = ('quantity',)
+
+
+class OrderQuerySerializer(serializers.Serializer):
+    status = serializers.IntegerField(required=False, help_text="Only orders with this status ID")
+    date_from = serializers.DateTimeField(required=False, help_text="Only orders placed at or after this time")
+    date_to = serializers.DateTimeField(required=False, help_text="Only orders placed before this time")
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor from the X-Next-Cursor header")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+
+class BasketLineSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class BasketCheckoutSerializer(serializers.Serializer):
+    address = serializers.IntegerField()
+    lines = BasketLineSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class BasketSerializer(serializers.ModelSerializer):
+    status = OrderStatusSerializer()
+    orders = OrderSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Basket
+        fields = ['id', 'user', 'status', 'address', 'total_price', 'is_paid', 'created_at', 'orders']
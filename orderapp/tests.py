@@ -1,3 +1,100 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from datetime import datetime, timezone
 
-# Tests
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accountapp.models import Account
+from addressapp.models import Address
+from categoryapp.models import Category
+from productapp.models import Product
+from userapp.models import UserProfile
+from utils.reference_cache import get_order_status
+
+from .models import Order, OrderDetails
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(user).access_token))
+    return client
+
+
+@override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600)
+class OrderQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        Account.objects.create(user=cls.seller, account_number='seller-1', balance=0)
+        category = Category.objects.create(category_name='c', description='c')
+        cls.product = Product.objects.create(user=cls.seller, category=category, title='t', description='d',
+                                             price=2, amount=100)
+        cls.address = Address.objects.create(user=cls.buyer, address_name='a')
+
+    def setUp(self):
+        # Order statuses come from the per-worker reference cache, load it outside the counted block.
+        get_order_status('created')
+        self.client = client_for(self.buyer)
+
+    def create_orders(self, count):
+        status = get_order_status('created')
+        for _ in range(count):
+            details = OrderDetails.objects.create(product=self.product, price=2, quantity=1, address=self.address,
+                                                  seller=self.seller)
+            Order.objects.create(user=self.buyer, status=status, order_details=details)
+
+    def test_order_list_queries_do_not_grow_with_the_page(self):
+        self.create_orders(1)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get('/orders/').status_code, 200)
+
+        self.create_orders(5)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get('/orders/').status_code, 200)
+
+    def test_seller_order_list(self):
+        self.create_orders(3)
+        with self.assertNumQueries(3):
+            self.assertEqual(client_for(self.seller).get('/orders/').status_code, 200)
+
+    def test_create_order(self):
+        with self.assertNumQueries(14):
+            response = self.client.post('/orders/', {'product': self.product.id, 'quantity': 1,
+                                                     'address': self.address.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ArchiveOrdersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        category = Category.objects.create(category_name='c', description='c')
+        product = Product.objects.create(user=seller, category=category, title='t', description='d', price=2,
+                                         amount=100)
+        address = Address.objects.create(user=buyer, address_name='a')
+        old = datetime(2020, 1, 15, tzinfo=timezone.utc)
+
+        def line(**order):
+            details = OrderDetails.objects.create(product=product, price=2, quantity=1, address=address,
+                                                  seller=seller, order_date=old)
+            if order:
+                Order.objects.create(user=buyer, status=get_order_status('created'), order_details=details, **order)
+            return details
+
+        cls.paid = line(is_paid=True)
+        cls.unpaid = line(is_paid=False)
+        cls.orphan = line()
+
+    def test_only_paid_lines_are_archived(self):
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+
+        call_command('archive_orders', before='2021-01', output_dir=output_dir, stdout=io.StringIO())
+
+        self.assertQuerySetEqual(OrderDetails.objects.order_by('id'), [self.unpaid, self.orphan])
@@ -6,6 +6,7 @@ from . import views
 urlpatterns = [
     path('', views.OrderList.as_view(), name='orders'),
     path('<int:_id>/', views.OrderDetail.as_view(), name='order_detail'),
+    path('checkout/', views.BasketCheckout.as_view(), name='checkout'),
     path('status/', views.OrderStatusList.as_view(), name='order_status'),
 ]
 
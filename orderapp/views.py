@@ -5,15 +5,22 @@ from django.db import transaction
 
 from addressapp.models import Address
 from .serializers import *
-from rest_framework.exceptions import PermissionDenied
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.conf import settings
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from utils.authentication import ProfileJWTAuthentication
 import logging
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from utils.tokens import get_user_id_from_token
+from productapp.cache import invalidate_product_listings
+from .checkout import CheckoutError, checkout_basket
+from productapp.stock import take_stock
+from utils.pagination import KeysetPaginator, paginated_response
+from utils.reference_cache import get_order_status, order_statuses
+from idempotencyapp.idempotency import idempotency_key_parameter, idempotent
+from utils.tokens import get_user_profile
 from userapp.models import UserProfile
 
 
@@ -21,12 +28,11 @@ logger = logging.getLogger('orderapp.views')
 
 
 class OrderDetail(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self, request, _id):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
         return get_object_or_404(Order, id=_id, user=user_profile, is_paid=False)
 
     @swagger_auto_schema(
@@ -49,8 +55,7 @@ class OrderDetail(APIView):
             order = self.get_object(request, _id)
             logger.info(f"Attempting to update order detail with ID {_id}.")
         except UserProfile.DoesNotExist:
-            user_id = get_user_id_from_token(request)
-            logger.warning(f"Failed to retrieve products for user with ID {user_id}. User profile not found.")
+            logger.warning(f"Failed to retrieve products for user with ID {request.user.id}. User profile not found.")
             return Response({"message": "You have not registered"}, status=status.HTTP_404_NOT_FOUND)
         except Http404:
             logger.warning(f"Failed to update order detail. Order detail with ID {_id} not found.")
@@ -78,12 +83,10 @@ class OrderDetail(APIView):
         try:
             order = self.get_object(request, _id)
         except Http404:
-            user_id = get_user_id_from_token(request)
-            logger.warning(f"Failed to retrieve products for user with ID {user_id}. order not found.")
+            logger.warning(f"Failed to retrieve products for user with ID {request.user.id}. order not found.")
             return Response({"message": "Order Not Found or this order has payed"}, status=status.HTTP_404_NOT_FOUND)
         except UserProfile.DoesNotExist:
-            user_id = get_user_id_from_token(request)
-            logger.warning(f"Failed to retrieve products for user with ID {user_id}. User profile not found.")
+            logger.warning(f"Failed to retrieve products for user with ID {request.user.id}. User profile not found.")
             return Response({"message": "You have not registered"}, status=status.HTTP_404_NOT_FOUND)
         except OrderDetails.DoesNotExist:
             logger.warning(f"Failed to delete order detail. Order detail with ID {_id} not found.")
@@ -97,50 +100,74 @@ class OrderDetail(APIView):
 
 
 class OrderList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    def filter_orders(self, orders, params):
+        if params.get('status') is not None:
+            orders = orders.filter(status_id=params['status'])
+        if params.get('date_from'):
+            orders = orders.filter(order_details__order_date__gte=params['date_from'])
+        if params.get('date_to'):
+            orders = orders.filter(order_details__order_date__lt=params['date_to'])
+        return orders
+
+    def get_page(self, orders, params):
+        # One query for the page (forward FKs joined in) and one for the products' images.
+        orders = orders.select_related(
+            'status',
+            'order_details__product',
+            'order_details__address',
+        ).prefetch_related('order_details__product__images')
+        paginator = KeysetPaginator(('-order_details__order_date', '-order_details__id'),
+                                    params.get('page_size') or settings.ORDER_PAGE_SIZE)
+        return paginator.paginate(self.filter_orders(orders, params), params.get('cursor'))
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
         ],
+        query_serializer=OrderQuerySerializer(),
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
+        query_serializer = OrderQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
         try:
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             if user_profile.is_admin:
-                product_orders = Order.objects.prefetch_related(
-                    'status',
-                    'order_details__product',
-                    'order_details__address',
-                ).filter(order_details__product__user=user_profile, order_details__is_deleted=False).distinct()
-                serializer = OrderSerializer(product_orders, many=True)
-                if not product_orders.exists():
+                # Served by the (seller, is_deleted, order_date, id) index, each order has one
+                # details row so no DISTINCT is needed.
+                product_orders, next_cursor = self.get_page(
+                    Order.objects.filter(order_details__seller=user_profile, order_details__is_deleted=False),
+                    params)
+                if not product_orders and not params.get('cursor'):
                     return Response("No one has purchased your products yet.", status=status.HTTP_404_NOT_FOUND)
-                logger.info(f"User with ID {user_id} retrieved their orders and product orders.")
-                return Response(serializer.data, status=status.HTTP_200_OK)
-
-            orders = Order.objects.prefetch_related(
-                'status',
-                'order_details__product',
-                'order_details__address',
-            ).filter(user=user_profile, order_details__is_deleted=False, is_in_the_card=True)
-            serializer = OrderSerializer(orders, many=True)
-            if not orders.exists():
+                serializer = OrderSerializer(product_orders, many=True)
+                logger.info(f"User with ID {request.user.id} retrieved their orders and product orders.")
+                return paginated_response(request, serializer.data, next_cursor)
+
+            orders, next_cursor = self.get_page(
+                Order.objects.filter(user=user_profile, order_details__is_deleted=False, is_in_the_card=True),
+                params)
+            if not orders and not params.get('cursor'):
                 return Response({"message": "You have no orders yet."}, status=status.HTTP_404_NOT_FOUND)
-            logger.info(f"User with ID {user_id} retrieved their orders.")
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            serializer = OrderSerializer(orders, many=True)
+            logger.info(f"User with ID {request.user.id} retrieved their orders.")
+            return paginated_response(request, serializer.data, next_cursor)
+        except ValidationError:
+            raise
         except UserProfile.DoesNotExist:
-            logger.warning(f"Failed to retrieve orders for user with ID {user_id}. User profile not found.")
+            logger.warning(f"Failed to retrieve orders for user with ID {request.user.id}. User profile not found.")
             return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Order.DoesNotExist:
-            logger.warning(f"Failed to retrieve orders for user with ID {user_id}. Order not found.")
+            logger.warning(f"Failed to retrieve orders for user with ID {request.user.id}. Order not found.")
             return Response({"message": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.warning(f"Failed to retrieve orders for user with ID {user_id}. {str(e)}")
+            logger.warning(f"Failed to retrieve orders for user with ID {request.user.id}. {str(e)}")
             return Response({"error": f"{str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @swagger_auto_schema(
@@ -156,21 +183,22 @@ class OrderList(APIView):
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
+            idempotency_key_parameter,
         ],
         security=[],
     )
+    @idempotent
     @transaction.atomic
     def post(self, request):
-        user_id = get_user_id_from_token(request)
         try:
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             if user_profile.is_admin:
                 raise PermissionDenied("Admins are not allowed to create orders.")
         except PermissionDenied as pd:
             logger.warning(f"Permission Denied: {str(pd)}")
             return Response({"error": str(pd)}, status=status.HTTP_403_FORBIDDEN)
         except UserProfile.DoesNotExist:
-            logger.warning(f"Failed to retrieve user with ID {user_id}. User profile not found.")
+            logger.warning(f"Failed to retrieve user with ID {request.user.id}. User profile not found.")
             return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Internal Server Error: {str(e)}")
@@ -197,7 +225,7 @@ class OrderList(APIView):
                     logger.warning(f"The choice of another address was successfully")
                 else:
                     addresses = Address.objects.filter(user=user_profile)
-                    logger.error(f"Failed to find address for user with id {user_id}")
+                    logger.error(f"Failed to find address for user with id {request.user.id}")
                     if addresses.exists():
                         return Response({
                             "message": f"Please choose another address"},
@@ -209,22 +237,20 @@ class OrderList(APIView):
 
             amount = serializer.validated_data['quantity']
 
-            if amount > product.amount or amount <= 0:
+            if take_stock(product, amount) is None:
                 logger.warning(f"Insufficient stock for product with ID {product_id}.")
                 return Response({"message": f"Insufficient stock for product with ID {product_id}."}, status=401)
-            else:
-                price = product.price * amount
-                product.amount -= amount
-                if product.amount == 0:
-                    product.is_deleted = True
+
+            price = product.price * amount
             order_details = OrderDetails.objects.create(
                 product=product,
                 price=price,
                 quantity=amount,
-                address=address_instance
+                address=address_instance,
+                seller_id=product.user_id
             )
 
-            order_status = OrderStatus.objects.get(id=1)
+            order_status = get_order_status('created')
 
             order = Order.objects.create(
                 user=user_profile,
@@ -233,9 +259,9 @@ class OrderList(APIView):
             )
             order_details.save()
             order.save()
-            product.save()
+            invalidate_product_listings(product.shop_id)
 
-            logger.info(f"User with ID {user_id} placed a new order with ID {order.id}.")
+            logger.info(f"User with ID {request.user.id} placed a new order with ID {order.id}.")
             return Response({"message": "Order created successfully"}, status=200)
 
         logger.error(f"Invalid data received while creating a new order: {serializer.errors}")
@@ -243,7 +269,7 @@ class OrderList(APIView):
 
 
 class OrderStatusList(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -255,8 +281,7 @@ class OrderStatusList(APIView):
     )
     def get(self, request):
         try:
-            order_statuses = OrderStatus.objects.all()
-            serializer = OrderStatusSerializer(order_statuses, many=True)
+            serializer = OrderStatusSerializer(order_statuses.all(), many=True)
             logger.info("Successfully retrieved all order statuses.")
             return Response(serializer.data, status=200)
         except Exception as e:
@@ -292,3 +317,52 @@ class OrderStatusList(APIView):
             logger.error(f"An error occurred while creating a new order status: {str(e)}")
             return Response({"error": str(e)}, status=500)
 
+
+
+class BasketCheckout(APIView):
+    authentication_classes = [ProfileJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+            idempotency_key_parameter,
+        ],
+        request_body=BasketCheckoutSerializer,
+        security=[],
+    )
+    @idempotent
+    def post(self, request):
+        try:
+            user_profile = get_user_profile(request)
+        except UserProfile.DoesNotExist:
+            logger.warning(f"Failed to retrieve user with ID {request.user.id}. User profile not found.")
+            return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        if user_profile.is_admin:
+            logger.warning(f"Permission Denied: Admin with ID {request.user.id} attempted a checkout.")
+            return Response({"error": "Admins are not allowed to create orders."}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = BasketCheckoutSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            address = Address.objects.get(id=serializer.validated_data['address'], user=user_profile,
+                                          is_deleted=False)
+        except Address.DoesNotExist:
+            return Response({"message": "Please choose another address"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            basket = checkout_basket(user_profile, address, serializer.validated_data['lines'])
+        except CheckoutError as e:
+            logger.warning(f"Checkout failed for user with ID {request.user.id}: {e.errors}")
+            return Response({"lines": e.errors}, status=e.status)
+
+        basket = Basket.objects.prefetch_related(
+            'orders__status',
+            'orders__order_details__product__images',
+        ).get(id=basket.id)
+        logger.info(
+            f"User with ID {request.user.id} checked out basket {basket.id} with {basket.orders.count()} lines.")
+        return Response(BasketSerializer(basket).data, status=status.HTTP_201_CREATED)
@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Payment
+from .models import BalanceCheckpoint, LedgerEntry, Payment
 
 admin.site.register(Payment)
+admin.site.register(LedgerEntry)
+admin.site.register(BalanceCheckpoint)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MyAppConfig(AppConfig):
     name = 'payapp'
+
+    def ready(self):
+        # Records the opening balance of accounts however they are created.
+        import payapp.ledger  # noqa: F401
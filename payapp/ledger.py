@@ -0,0 +1,158 @@
+"""
+Double-entry ledger behind account balances.
+
+Every money movement is a transfer: immutable LedgerEntry rows, one per account, summing to
+zero. Account.balance stays the balance everything reads, ``transfer`` moves it in the same
+transaction with a fixed number of statements however many accounts take part:
+
+- one SELECT ... FOR UPDATE locks the accounts in id order, so concurrent transfers over
+  overlapping accounts queue up instead of deadlocking;
+- one UPDATE applies every debit and credit, debits are checked against the locked balances;
+- one INSERT writes the entries.
+
+``top_up`` credits accounts with money from outside the shop the same way, without the
+balance checks: one locking read, one UPDATE and one INSERT for any number of accounts.
+
+BalanceCheckpoint rows (python manage.py checkpoint_balances) snapshot each account's ledger
+balance, so ``ledger_balance`` only sums the entries after the latest one.
+
+Amounts are Decimals rounded to the cent; float prices are converted with ``to_money``.
+"""
+import uuid
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.signals import post_save
+
+from .models import Account, BalanceCheckpoint, LedgerEntry
+
+CENT = Decimal('0.01')
+
+
+def to_money(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class InsufficientFunds(Exception):
+    def __init__(self, account_id):
+        super().__init__(f"Account {account_id} has insufficient funds.")
+        self.account_id = account_id
+
+
+def combine(legs):
+    """Sums (account_id, amount) legs per account and drops the ones that cancel out."""
+    totals = defaultdict(Decimal)
+    for account_id, amount in legs:
+        totals[account_id] += to_money(amount)
+    return {account_id: amount for account_id, amount in totals.items() if amount}
+
+
+def credit_accounts(amounts):
+    """Adds ``amounts``, by account id, to the balances in one UPDATE. The accounts should be locked."""
+    Account.objects.filter(id__in=amounts).update(balance=F('balance') + Case(
+        *[When(id=account_id, then=Value(amount)) for account_id, amount in amounts.items()],
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    ))
+
+
+@transaction.atomic
+def transfer(legs, kind, reference=''):
+    """
+    Posts a transfer. ``legs`` are (account_id, amount) pairs, debits negative, with ``None``
+    for money entering or leaving the shop; they must sum to zero. Returns the new balances
+    of the accounts by id, raises InsufficientFunds if a debit would overdraw an account.
+    """
+    changes = combine(legs)
+    if sum(changes.values()):
+        raise ValueError(f"Transfer legs don't balance: {changes}.")
+    account_changes = {account_id: amount for account_id, amount in changes.items() if account_id is not None}
+
+    balances = dict(Account.objects.select_for_update().filter(id__in=account_changes)
+                    .order_by('id').values_list('id', 'balance'))
+    for account_id, amount in account_changes.items():
+        if account_id not in balances:
+            raise Account.DoesNotExist(f"Account {account_id} does not exist.")
+        if amount < 0 and balances[account_id] + amount < 0:
+            raise InsufficientFunds(account_id)
+
+    if account_changes:
+        credit_accounts(account_changes)
+    transfer_id = uuid.uuid4()
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(transfer=transfer_id, account_id=account_id, amount=amount, kind=kind, reference=reference)
+        for account_id, amount in changes.items()
+    ])
+    return {account_id: balances[account_id] + amount for account_id, amount in account_changes.items()}
+
+
+@transaction.atomic
+def top_up(credits, kind=LedgerEntry.TOP_UP, reference='', user_id=None):
+    """
+    Credits ``credits``, (account_id, amount) pairs, with money from outside the shop.
+    Deleted accounts, and with ``user_id`` other users' accounts, are skipped. Returns the
+    new balances of the credited accounts by id.
+    """
+    credits = combine(credits)
+    if not credits:
+        return {}
+    accounts = Account.objects.filter(id__in=credits, is_deleted=False)
+    if user_id is not None:
+        accounts = accounts.filter(user_id=user_id)
+    # Locked in id order like ``transfer``, a bare UPDATE over several rows locks them in
+    # whatever order it finds them.
+    balances = dict(accounts.select_for_update().order_by('id').values_list('id', 'balance'))
+
+    if balances:
+        credit_accounts({account_id: credits[account_id] for account_id in balances})
+        transfer_id = uuid.uuid4()
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(transfer=transfer_id, account=None, amount=-sum(credits[account_id] for account_id in balances),
+                        kind=kind, reference=reference),
+            *[LedgerEntry(transfer=transfer_id, account_id=account_id, amount=credits[account_id], kind=kind,
+                          reference=reference)
+              for account_id in balances],
+        ])
+    return {account_id: balance + credits[account_id] for account_id, balance in balances.items()}
+
+
+def ledger_balance(account_id):
+    """The account's balance according to its latest checkpoint and the entries after it."""
+    checkpoint = BalanceCheckpoint.objects.filter(account_id=account_id).order_by('-entry_id').first()
+    entries = LedgerEntry.objects.filter(account_id=account_id)
+    balance = Decimal(0)
+    if checkpoint is not None:
+        entries = entries.filter(id__gt=checkpoint.entry_id)
+        balance = checkpoint.balance
+    return balance + (entries.aggregate(total=Sum('amount'))['total'] or 0)
+
+
+@transaction.atomic
+def checkpoint_balance(account_id):
+    """
+    Saves a checkpoint of the account's ledger balance. Returns it with Account.balance, which
+    should be equal. The account is locked, so no transfer on it is half committed.
+    """
+    balance = Account.objects.select_for_update().filter(id=account_id).values_list('balance', flat=True).get()
+    last_entry_id = (LedgerEntry.objects.filter(account_id=account_id).order_by('-id')
+                     .values_list('id', flat=True).first())
+    ledger = ledger_balance(account_id)
+    if last_entry_id is not None:
+        BalanceCheckpoint.objects.create(account_id=account_id, entry_id=last_entry_id, balance=ledger)
+    return ledger, balance
+
+
+def record_opening_balance(sender, instance, created, raw=False, **kwargs):
+    # New accounts start with a balance (Account.balance has a default); the ledger gets it
+    # as money coming from outside the shop. The balance itself is already saved.
+    if created and not raw and instance.balance:
+        balance = to_money(instance.balance)
+        transfer_id = uuid.uuid4()
+        LedgerEntry.objects.bulk_create([
+            LedgerEntry(transfer=transfer_id, account=None, amount=-balance, kind=LedgerEntry.OPENING),
+            LedgerEntry(transfer=transfer_id, account=instance, amount=balance, kind=LedgerEntry.OPENING),
+        ])
+
+
+post_save.connect(record_opening_balance, sender=Account)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from payapp.ledger import checkpoint_balance
+from payapp.models import Account, BalanceCheckpoint, LedgerEntry
+
+
+class Command(BaseCommand):
+    help = ("Checkpoint the ledger balance of every account with new ledger entries and report "
+            "accounts whose balance doesn't match their ledger.")
+
+    def handle(self, *args, **options):
+        last_checkpoint = (BalanceCheckpoint.objects.filter(account=OuterRef(OuterRef('pk')))
+                           .order_by('-entry_id').values('entry_id')[:1])
+        new_entries = LedgerEntry.objects.filter(account=OuterRef('pk'),
+                                                 id__gt=Coalesce(Subquery(last_checkpoint), Value(0)))
+        account_ids = list(Account.objects.filter(Exists(new_entries)).order_by('id').values_list('id', flat=True))
+
+        checkpointed = mismatched = 0
+        for account_id in account_ids:
+            ledger, balance = checkpoint_balance(account_id)
+            checkpointed += 1
+            if ledger != balance:
+                mismatched += 1
+                self.stderr.write(f"Account {account_id}: balance {balance}, ledger {ledger}.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checkpointed {checkpointed} accounts, {mismatched} don't match their ledger."))
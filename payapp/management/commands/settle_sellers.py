@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from payapp.settlement import settle_pending
+
+
+class Command(BaseCommand):
+    help = "Credit pending seller settlements to seller accounts, once or every --interval seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.SELLER_SETTLEMENT_BATCH_SIZE,
+                            help="Settlements credited per transaction")
+        parser.add_argument('--interval', type=int, help="Keep running, settling every INTERVAL seconds")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            settled = 0
+            while True:
+                batch = settle_pending(options['batch_size'])
+                settled += batch
+                if batch < options['batch_size']:
+                    break
+            self.stdout.write(self.style.SUCCESS(f"Settled {settled} seller settlements."))
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
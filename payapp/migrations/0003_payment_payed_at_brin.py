@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:58
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('orderapp', '0007_order_history_indexes'),
+        ('payapp', '0002_initial'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['payed_at'], name='payment_payed_at_brin'),
+        ),
+    ]
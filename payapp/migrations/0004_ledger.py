@@ -0,0 +1,60 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:03
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    # Existing balances enter the ledger as money from outside the shop.
+    Account = apps.get_model('accountapp', 'Account')
+    LedgerEntry = apps.get_model('payapp', 'LedgerEntry')
+    entries = []
+    for account_id, balance in Account.objects.exclude(balance=0).values_list('id', 'balance').iterator():
+        transfer = uuid.uuid4()
+        entries += [
+            LedgerEntry(transfer=transfer, account_id=None, amount=-balance, kind='opening'),
+            LedgerEntry(transfer=transfer, account_id=account_id, amount=balance, kind='opening'),
+        ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('payapp', '0003_payment_payed_at_brin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.BigIntegerField()),
+                ('balance', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='accountapp.account')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', '-entry_id'], name='balance_checkpoint_account_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transfer', models.UUIDField(db_index=True)),
+                ('amount', models.FloatField()),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('payment', 'Payment')], max_length=20)),
+                ('reference', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='accountapp.account')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'id'], name='ledger_entry_account_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
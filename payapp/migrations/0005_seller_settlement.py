@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('payapp', '0004_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='kind',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('payment', 'Payment'), ('settlement', 'Seller settlement')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SellerSettlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('settled_at', models.DateTimeField(blank=True, null=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settlements', to='accountapp.account')),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='payapp.payment')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('settled_at__isnull', True)), fields=['id'], name='seller_settlement_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('orderapp', '0007_order_history_indexes'),
+        ('payapp', '0005_seller_settlement'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', 'payed_at', 'id'], name='payment_user_history_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payapp', '0006_payment_history_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='balancecheckpoint',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='kind',
+            field=models.CharField(choices=[('opening', 'Opening balance'), ('payment', 'Payment'), ('settlement', 'Seller settlement'), ('top_up', 'Top-up')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='sellersettlement',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=14),
+        ),
+    ]
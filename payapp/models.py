@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from userapp.models import UserProfile
 from productapp.models import Account
@@ -13,5 +15,90 @@ class Payment(models.Model):
     payed_at = models.DateTimeField(default=timezone.now)
     is_deleted = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            BrinIndex(fields=['payed_at'], name='payment_payed_at_brin'),
+            models.Index(fields=['user', 'payed_at', 'id'], name='payment_user_history_idx',
+                         condition=Q(is_deleted=False)),
+        ]
+
+    def __str__(self):
+        return f"Payment for Order {self.order_id} by user {self.user_id}"
+
+
+class LedgerEntry(models.Model):
+    """
+    One leg of a money movement, see payapp.ledger. Rows are never changed: the entries of a
+    transfer share ``transfer`` and sum to zero. A leg without an account is money outside the
+    accounts: entering the shop (opening balances, top-ups) or paid and waiting for seller
+    settlement.
+    """
+    OPENING = 'opening'
+    PAYMENT = 'payment'
+    SETTLEMENT = 'settlement'
+    TOP_UP = 'top_up'
+    KIND_CHOICES = [
+        (OPENING, 'Opening balance'),
+        (PAYMENT, 'Payment'),
+        (SETTLEMENT, 'Seller settlement'),
+        (TOP_UP, 'Top-up'),
+    ]
+
+    transfer = models.UUIDField(db_index=True)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='ledger_entries')
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    # What the transfer was for, e.g. "order_details:12" or "basket:3"
+    reference = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'id'], name='ledger_entry_account_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Ledger entries can't be changed.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries can't be deleted.")
+
+    def __str__(self):
+        return f"{self.kind} {self.amount} on account {self.account_id}"
+
+
+class BalanceCheckpoint(models.Model):
+    """An account's ledger balance up to and including entry ``entry_id``."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='balance_checkpoints')
+    entry_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', '-entry_id'], name='balance_checkpoint_account_idx'),
+        ]
+
+    def __str__(self):
+        return f"Account {self.account_id}: {self.balance} at entry {self.entry_id}"
+
+
+class SellerSettlement(models.Model):
+    """A seller's share of a payment, credited to ``account`` by payapp.settlement."""
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='settlements')
+    # Kept when old payments are archived, the money is still owed
+    payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], name='seller_settlement_pending_idx', condition=Q(settled_at__isnull=True)),
+        ]
+
     def __str__(self):
-        return f"Payment for Order {self.order.id} by {self.user.username}"
+        return f"Settlement of {self.amount} to account {self.account_id}"
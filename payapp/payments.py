@@ -0,0 +1,109 @@
+from django.db import transaction
+
+from accountapp.models import Account
+from orderapp.models import Basket, Order
+from utils.reference_cache import get_order_status
+
+from .ledger import InsufficientFunds, to_money, transfer
+from .models import LedgerEntry, Payment
+from .settlement import queue_settlements
+
+
+class PaymentError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def seller_accounts(products):
+    """Account each product's money goes to: its default account or the seller's first one."""
+    sellers = {product.user_id for product in products if not product.default_account_id}
+    first_accounts = {}
+    for account_id, user_id in Account.objects.filter(user_id__in=sellers).order_by('id').values_list('id', 'user_id'):
+        first_accounts.setdefault(user_id, account_id)
+    return {product.id: product.default_account_id or first_accounts.get(product.user_id) for product in products}
+
+
+def post_payment(account, details, reference):
+    """
+    Debits ``account`` for ``details`` (OrderDetails) into clearing. Returns the seller
+    account of each product, the sellers are credited later by payapp.settlement.
+    """
+    destinations = seller_accounts([order_details.product for order_details in details])
+    for order_details in details:
+        if destinations[order_details.product_id] is None:
+            raise PaymentError(f"Seller of product {order_details.product_id} has no account.", status=404)
+
+    total = sum(to_money(order_details.price) for order_details in details)
+    try:
+        balances = transfer([(account.id, -total), (None, total)], LedgerEntry.PAYMENT, reference)
+    except InsufficientFunds:
+        raise PaymentError("You do not have enough funds to make the purchase", status=401)
+    account.balance = balances[account.id]
+    return destinations
+
+
+@transaction.atomic
+def pay_order(order, account):
+    """Pays a single order from ``account``. ``order`` should come with its order_details and product."""
+    # Basket lines lock the basket first, in the same order as pay_basket.
+    if order.basket_id:
+        Basket.objects.select_for_update().filter(id=order.basket_id).exists()
+    # Marked paid before any money moves: a concurrent payment of the same order waits on the
+    # row here and then finds it already paid.
+    paid_status = get_order_status('paid')
+    if not Order.objects.filter(id=order.id, is_paid=False).update(is_paid=True, is_in_the_card=False,
+                                                                    status=paid_status):
+        raise PaymentError("Order has already been paid.", status=409)
+    if order.basket_id and not Order.objects.filter(basket_id=order.basket_id, is_paid=False,
+                                                    order_details__is_deleted=False).exists():
+        # Its last unpaid line, nothing is left for pay_basket.
+        Basket.objects.filter(id=order.basket_id).update(is_paid=True, status=paid_status)
+    order.is_paid = True
+    order.is_in_the_card = False
+    order.status = paid_status
+
+    order_details = order.order_details
+    destinations = post_payment(account, [order_details], f'order_details:{order_details.id}')
+    payment = Payment.objects.create(order=order_details, account=account, user_id=order.user_id,
+                                     amount=order_details.quantity, price=order_details.price)
+    queue_settlements([payment], destinations)
+    return payment
+
+
+@transaction.atomic
+def pay_basket(basket, account):
+    """
+    Pays every unpaid line of ``basket`` from ``account`` in one transaction: one ledger
+    transfer debits the buyer for the total, the payments, seller settlements and order
+    updates are written in bulk.
+    """
+    # Concurrent payments of the basket queue up on its row, the lines are read after the lock.
+    if not Basket.objects.select_for_update().filter(id=basket.id, is_paid=False).exists():
+        raise PaymentError("Basket has already been paid.", status=409)
+    # Lines already paid on their own through pay_order are skipped, the rest are locked so
+    # none of them can be paid twice.
+    orders = list(basket.orders.select_for_update(of=('self',)).select_related('order_details__product')
+                  .filter(is_paid=False, order_details__is_deleted=False))
+    if not orders:
+        raise PaymentError("Nothing to pay in this basket.", status=404)
+
+    paid_status = get_order_status('paid')
+    Order.objects.filter(id__in=[order.id for order in orders]).update(is_paid=True, is_in_the_card=False,
+                                                                       status=paid_status)
+
+    details = [order.order_details for order in orders]
+    destinations = post_payment(account, details, f'basket:{basket.id}')
+
+    payments = Payment.objects.bulk_create([
+        Payment(order=order_details, account=account, user=basket.user, amount=order_details.quantity,
+                price=order_details.price)
+        for order_details in details
+    ])
+    queue_settlements(payments, destinations)
+
+    basket.is_paid = True
+    basket.status = paid_status
+    basket.save(update_fields=['is_paid', 'status'])
+    return payments
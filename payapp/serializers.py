@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Payment
+from accountapp.models import Account
 from accountapp.serializers import AccountSerializer
 from orderapp.serializers import OrderDetailsSerializer
 from userapp.models import UserProfile
@@ -13,3 +14,24 @@ class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = '__all__'
+
+
+class AccountSettlementSerializer(serializers.ModelSerializer):
+    pending = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = Account
+        fields = ['id', 'account_number', 'balance', 'pending']
+
+
+class PaymentQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateTimeField(required=False, help_text="Only payments made at or after this time")
+    date_to = serializers.DateTimeField(required=False, help_text="Only payments made before this time")
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor from the X-Next-Cursor header")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=100)
+
+
+class PaymentStatementQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateTimeField(required=False, help_text="Only payments made at or after this time")
+    date_to = serializers.DateTimeField(required=False, help_text="Only payments made before this time")
+    export = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
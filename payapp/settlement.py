@@ -0,0 +1,45 @@
+"""
+Deferred seller settlement.
+
+A payment debits the buyer into the ledger's clearing side and leaves a SellerSettlement row
+per line instead of crediting the seller in the buyer's transaction, so checkouts of a
+popular seller's products no longer queue up on their account row. ``settle_pending``
+(python manage.py settle_sellers) folds the pending rows into seller balances in batches:
+one ledger transfer per batch, summed per account.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import to_money, transfer
+from .models import LedgerEntry, SellerSettlement
+
+
+def queue_settlements(payments, destinations):
+    """Records what each seller is owed for ``payments``; ``destinations`` maps product ids to accounts."""
+    SellerSettlement.objects.bulk_create([
+        SellerSettlement(account_id=destinations[payment.order.product_id], payment=payment,
+                         amount=to_money(payment.price))
+        for payment in payments
+    ])
+
+
+@transaction.atomic
+def settle_pending(limit):
+    """Credits up to ``limit`` pending settlements. Returns how many were settled."""
+    # SKIP LOCKED: concurrent settlers take different rows.
+    pending = list(SellerSettlement.objects.select_for_update(skip_locked=True)
+                   .filter(settled_at__isnull=True).order_by('id')
+                   .values_list('id', 'account_id', 'amount')[:limit])
+    if not pending:
+        return 0
+
+    totals = defaultdict(Decimal)
+    for _, account_id, amount in pending:
+        totals[account_id] += amount
+    transfer([(None, -sum(totals.values())), *totals.items()], LedgerEntry.SETTLEMENT, 'settlement')
+    SellerSettlement.objects.filter(id__in=[settlement_id for settlement_id, _, _ in pending]).update(
+        settled_at=timezone.now())
+    return len(pending)
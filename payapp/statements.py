@@ -0,0 +1,27 @@
+"""
+Account statements: a user's payments over a date range streamed as CSV or JSON Lines.
+
+Rows are read as ``values()`` over a server-side cursor with the product and account joined
+in, so memory use doesn't grow with the number of payments.
+"""
+from django.conf import settings
+
+# Column name -> Payment lookup
+STATEMENT_COLUMNS = {
+    'payment_id': 'id',
+    'payed_at': 'payed_at',
+    'order_details_id': 'order_id',
+    'product_id': 'order__product_id',
+    'product_title': 'order__product__title',
+    'quantity': 'amount',
+    'price': 'price',
+    'account_number': 'account__account_number',
+}
+
+
+def iter_statement_rows(payments):
+    """Yields one dict per payment, oldest first."""
+    rows = (payments.order_by('payed_at', 'id').values_list(*STATEMENT_COLUMNS.values())
+            .iterator(chunk_size=settings.PAYMENT_STATEMENT_CHUNK_SIZE))
+    for row in rows:
+        yield dict(zip(STATEMENT_COLUMNS, row))
@@ -1,3 +1,235 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Tests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accountapp.models import Account
+from addressapp.models import Address
+from categoryapp.models import Category
+from orderapp.checkout import checkout_basket
+from orderapp.models import Basket, Order, OrderDetails
+from productapp.models import Product
+from userapp.models import UserProfile
+from utils.reference_cache import get_order_status
+
+from .ledger import ledger_balance, top_up
+from .models import Payment
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(user).access_token))
+    return client
+
+
+class PaymentHistoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        cls.account = Account.objects.create(user=cls.buyer, account_number='buyer-1', balance=100)
+        category = Category.objects.create(category_name='c', description='c')
+        product = Product.objects.create(user=seller, category=category, title='t', description='d', price=2,
+                                         amount=10)
+        address = Address.objects.create(user=cls.buyer, address_name='a')
+        cls.order_details = OrderDetails.objects.create(product=product, price=2, quantity=1, address=address)
+
+    def test_pages_split_inside_one_millisecond(self):
+        # Payments of one basket are written together and share a millisecond.
+        payed_at = timezone.now().replace(microsecond=500000)
+        Payment.objects.bulk_create([
+            Payment(user=self.buyer, order=self.order_details, account=self.account, amount=1, price=2,
+                    payed_at=payed_at + timedelta(microseconds=index))
+            for index in range(7)
+        ])
+        client = client_for(self.buyer)
+
+        seen, cursor = [], None
+        while True:
+            response = client.get('/payment/', {'page_size': 3, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            seen += [payment['id'] for payment in response.json()]
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+
+        self.assertEqual(sorted(seen), sorted(Payment.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+@override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600)
+class PaymentQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        cls.account = Account.objects.create(user=cls.buyer, account_number='buyer-1', balance=100)
+        Account.objects.create(user=cls.seller, account_number='seller-1', balance=0)
+        category = Category.objects.create(category_name='c', description='c')
+        cls.product = Product.objects.create(user=cls.seller, category=category, title='t', description='d',
+                                             price=2, amount=10)
+        cls.address = Address.objects.create(user=cls.buyer, address_name='a')
+
+    def setUp(self):
+        # Order statuses come from the per-worker reference cache, load it outside the counted block.
+        get_order_status('paid')
+        self.client = client_for(self.buyer)
+
+    def create_order(self):
+        details = OrderDetails.objects.create(product=self.product, price=2, quantity=1, address=self.address,
+                                              seller=self.seller)
+        return Order.objects.create(user=self.buyer, status=get_order_status('created'), order_details=details)
+
+    def test_payment_history_queries_do_not_grow_with_the_page(self):
+        for count in (1, 5):
+            Payment.objects.bulk_create([
+                Payment(user=self.buyer, order=self.create_order().order_details, account=self.account, amount=1,
+                        price=2)
+                for _ in range(count)
+            ])
+            with self.assertNumQueries(2):
+                self.assertEqual(self.client.get('/payment/').status_code, 200)
+
+    def test_pay_order(self):
+        order = self.create_order()
+        with self.assertNumQueries(14):
+            response = self.client.post(f'/payment/pay_order/{order.id}/', {'account_number': 'buyer-1'},
+                                        format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class IdempotentPaymentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        Account.objects.create(user=cls.buyer, account_number='buyer-1', balance='100.10')
+        Account.objects.create(user=seller, account_number='seller-1', balance=0)
+        category = Category.objects.create(category_name='c', description='c')
+        product = Product.objects.create(user=seller, category=category, title='t', description='d', price=2,
+                                         amount=10)
+        address = Address.objects.create(user=cls.buyer, address_name='a')
+        details = OrderDetails.objects.create(product=product, price=2, quantity=1, address=address, seller=seller)
+        cls.order = Order.objects.create(user=cls.buyer, status=get_order_status('created'), order_details=details)
+
+    def pay(self, client):
+        return client.post(f'/payment/pay_order/{self.order.id}/', {'account_number': 'buyer-1'}, format='json',
+                           HTTP_IDEMPOTENCY_KEY='pay-1')
+
+    def test_replay_returns_the_original_body(self):
+        client = client_for(self.buyer)
+
+        first = self.pay(client)
+        replayed = self.pay(client)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(replayed.json(), first.json())
+        self.assertEqual(replayed.json()['account']['balance'], 98.1)
+
+
+class BasketPaymentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        cls.account = Account.objects.create(user=cls.buyer, account_number='buyer-1', balance=100)
+        Account.objects.create(user=seller, account_number='seller-1', balance=0)
+        category = Category.objects.create(category_name='c', description='c')
+        cls.products = [
+            Product.objects.create(user=seller, category=category, title='t', description=f'd{index}', price=0.1,
+                                   amount=10)
+            for index in range(2)
+        ]
+        cls.address = Address.objects.create(user=cls.buyer, address_name='a')
+
+    def setUp(self):
+        self.basket = checkout_basket(self.buyer, self.address,
+                                      [{'product': product.id, 'quantity': 3} for product in self.products])
+        self.client = client_for(self.buyer)
+
+    def pay_line(self, index):
+        order = self.basket.orders.get(order_details__product=self.products[index])
+        return self.client.post(f'/payment/pay_order/{order.id}/', {'account_number': 'buyer-1'}, format='json')
+
+    def test_total_is_the_sum_of_the_line_prices(self):
+        self.basket.refresh_from_db()
+        self.assertEqual(str(self.basket.total_price), '0.60')
+
+    def test_lines_paid_on_their_own_are_skipped(self):
+        self.assertEqual(self.pay_line(0).status_code, 200)
+
+        response = self.client.post(f'/payment/pay_basket/{self.basket.id}/', {'account_number': 'buyer-1'},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([payment['order']['id'] for payment in response.json()],
+                         [self.basket.orders.get(order_details__product=self.products[1]).order_details_id])
+        self.assertTrue(Basket.objects.get(id=self.basket.id).is_paid)
+        self.account.refresh_from_db()
+        self.assertEqual(str(self.account.balance), '99.40')
+
+    def test_paying_every_line_on_its_own_closes_the_basket(self):
+        for index in range(2):
+            self.assertEqual(self.pay_line(index).status_code, 200)
+
+        self.assertTrue(Basket.objects.get(id=self.basket.id).is_paid)
+
+
+class OrderPayAccountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.buyer = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        Account.objects.create(user=seller, account_number='seller-1', balance=0)
+        category = Category.objects.create(category_name='c', description='c')
+        product = Product.objects.create(user=seller, category=category, title='t', description='d', price=2,
+                                         amount=10)
+        address = Address.objects.create(user=cls.buyer, address_name='a')
+        details = OrderDetails.objects.create(product=product, price=2, quantity=1, address=address, seller=seller)
+        cls.order = Order.objects.create(user=cls.buyer, status=get_order_status('created'), order_details=details)
+
+    def pay(self, account_number):
+        return client_for(self.buyer).post(f'/payment/pay_order/{self.order.id}/',
+                                           {'account_number': account_number}, format='json')
+
+    def test_requested_account_comes_before_the_balance_fallback(self):
+        Account.objects.create(user=self.buyer, account_number='rich', balance=100)
+        Account.objects.create(user=self.buyer, account_number='poor', balance=1)
+
+        response = self.pay('poor')
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_deleted_accounts_are_never_charged(self):
+        Account.objects.create(user=self.buyer, account_number='closed', balance=100, is_deleted=True)
+        account = Account.objects.create(user=self.buyer, account_number='open', balance=100)
+
+        response = self.pay('closed')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['account']['id'], account.id)
+
+
+class TopUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserProfile.objects.create_user(username='buyer', password='x', age=30)
+        other = UserProfile.objects.create_user(username='other', password='x', age=30)
+        cls.account = Account.objects.create(user=cls.user, account_number='buyer-1', balance=10)
+        cls.closed = Account.objects.create(user=cls.user, account_number='buyer-2', balance=0, is_deleted=True)
+        cls.others = Account.objects.create(user=other, account_number='other-1', balance=0)
+
+    def test_only_live_accounts_of_the_user_are_credited(self):
+        credits = [(self.account.id, '2.50'), (self.closed.id, 1), (self.others.id, 1)]
+
+        balances = top_up(credits, user_id=self.user.id)
+
+        self.assertEqual(balances, {self.account.id: Decimal('12.50')})
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('12.50'))
+        self.assertEqual(ledger_balance(self.account.id), Decimal('12.50'))
+        self.assertEqual(ledger_balance(self.others.id), 0)
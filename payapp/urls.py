@@ -5,5 +5,8 @@ from . import views
 urlpatterns = [
     path('', views.OrderPaid.as_view(), name='Payment'),
     path('pay_order/<int:_id>/', views.OrderPay.as_view(), name='order_pay'),
+    path('pay_basket/<int:_id>/', views.BasketPay.as_view(), name='basket_pay'),
+    path('statement/', views.PaymentStatement.as_view(), name='payment_statement'),
+    path('settlements/', views.SellerSettlements.as_view(), name='seller_settlements'),
     path('<int:_id>/', views.PayMentDetail.as_view(), name='payment'),
 ]
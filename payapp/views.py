@@ -1,143 +1,151 @@
-from django.shortcuts import get_object_or_404
+from decimal import Decimal
+
 from rest_framework import permissions
 from drf_yasg import openapi
-from django.db import transaction
+from django.db.models import Q, Sum, Value
+from django.db.models.functions import Coalesce
 from .serializers import *
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 import logging
-from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from utils.tokens import get_user_id_from_token
-from orderapp.models import (Order,
-                             OrderDetails,
-                             OrderStatus
+from idempotencyapp.idempotency import idempotency_key_parameter, idempotent
+from utils.tokens import get_user_profile
+from orderapp.models import (Basket,
+                             Order
                              )
+from django.conf import settings
 from payapp.models import Account
-from productapp.models import Product
+from utils.pagination import KeysetPaginator, paginated_response
+from utils.streaming import streaming_csv_response, streaming_json_response
+from .ledger import to_money
+from .payments import PaymentError, pay_basket, pay_order
+from .statements import STATEMENT_COLUMNS, iter_statement_rows
 
 
 logger = logging.getLogger('payapp.views')
 
 
 class OrderPay(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
+            idempotency_key_parameter,
         ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'account_number': openapi.Schema(type=openapi.TYPE_STRING, description="Amount of the item",
+                                                 default="1")
+            },
+        ),
         security=[],
     )
-    def get_order(self, _id, request):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
-        return get_object_or_404(Order, id=_id, is_paid=False, user=user_profile)
+    @idempotent
+    def post(self, request, _id):
+        order = (Order.objects.select_related('order_details__product', 'order_details__address')
+                 .filter(id=_id, is_paid=False, user_id=request.user.id).first())
+        if order is None:
+            logger.warning(f"Failed to process payment. Order with ID {_id} not found.")
+            return Response({"message": "Order not found."}, status=404)
+        logger.info(f"Attempting to process payment for order with ID {_id}.")
+
+        _account_number = request.data.get('account_number')
+        if not _account_number:
+            logger.warning(f"Failed to process payment. Account number not found.")
+            return Response({"message": "Account number not provided."}, status=404)
+
+        # The requested account, or else the first one that can cover the price.
+        accounts = Account.objects.filter(user_id=request.user.id, is_deleted=False)
+        account = accounts.filter(account_number=_account_number).first()
+        if account is None:
+            account = accounts.filter(balance__gte=to_money(order.order_details.price)).order_by('id').first()
+        if account is None:
+            if accounts.exists():
+                logger.warning(f"Failed to process payment. Insufficient funds for order with ID {_id}.")
+                return Response({"message": "You do not have enough funds to make the purchase"}, status=401)
+            logger.warning(f"Failed to retrieve products for user with ID {request.user.id}. Account Not Found.")
+            return Response({"warning": "You are have not account please create account and replay."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            payment = pay_order(order, account)
+        except PaymentError as e:
+            logger.warning(f"Failed to process payment for order with ID {_id}: {e.message}")
+            return Response({"message": e.message}, status=e.status)
+
+        logger.info(f"Payment processed successfully for order with ID {_id}.")
+        serializer = PaymentSerializer(payment)
+        return Response(serializer.data, status=200)
+
+
+class BasketPay(APIView):
+    authentication_classes = [ProfileJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
+            idempotency_key_parameter,
         ],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={
-                'account_number': openapi.Schema(type=openapi.TYPE_STRING, description="Amount of the item",
+                'account_number': openapi.Schema(type=openapi.TYPE_STRING, description="Account to pay from",
                                                  default="1")
             },
         ),
         security=[],
     )
-    @transaction.atomic
+    @idempotent
     def post(self, request, _id):
-        account = None
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
 
         try:
-            order = self.get_order(_id, request)
-            logger.info(f"Attempting to process payment for order with ID {_id}.")
-        except Http404:
-            logger.warning(f"Failed to process payment. Order with ID {_id} not found.")
-            return Response({"message": "Order not found."}, status=404)
-
-        try:
-            order_details = OrderDetails.objects.get(id=order.order_details.id)
-        except OrderDetails.DoesNotExist:
-            logger.warning(f"Failed to process payment. Order details not found for order with ID {_id}.")
-            return Response({"message": "Order details not found."}, status=404)
+            basket = Basket.objects.get(id=_id, user=user_profile, is_paid=False)
+        except Basket.DoesNotExist:
+            logger.warning(f"Failed to process payment. Basket with ID {_id} not found.")
+            return Response({"message": "Basket not found."}, status=404)
 
         _account_number = request.data.get('account_number')
-        if not _account_number:
-            logger.warning(f"Failed to process payment. Account number not found.")
-            return Response({"message": "Account number not provided."}, status=404)
         try:
-            account = Account.objects.get(account_number=_account_number, user=user_profile)
+            account = Account.objects.get(account_number=_account_number, user=user_profile, is_deleted=False)
         except Account.DoesNotExist:
-            accounts = Account.objects.filter(user=user_profile)
-            if accounts.exists():
-                for _account in accounts:
-                    if _account.balance >= order_details.price:
-                        _account.balance -= order_details.price
-                        account = _account
-                        break
-            else:
-                user_id = get_user_id_from_token(request)
-                logger.warning(f"Failed to retrieve products for user with ID {user_id}. Account Not Found.")
+            account = Account.objects.filter(user=user_profile, is_deleted=False,
+                                             balance__gte=basket.total_price).first()
+            if account is None:
+                logger.warning(f"Failed to process payment for basket {_id}. Account Not Found.")
                 return Response({"warning": "You are have not account please create account and replay."},
                                 status=status.HTTP_404_NOT_FOUND)
+
         try:
-            user_profile = UserProfile.objects.get(id=order.user.id)
-        except UserProfile.DoesNotExist:
-            logger.warning(f"Failed to process payment. User profile not found for user with ID {order.user.id}.")
-            return Response({"message": f"User profile not found for user with ID {order.user.id}."}, status=404)
-        if account and hasattr(account, 'balance') and account.balance >= order_details.price:
-            account.balance -= order_details.price
-            try:
-                product = Product.objects.get(id=order_details.product.id)
-            except Product.DoesNotExist:
-                logger.warning(f"Failed to process payment. Product not found.")
-                return Response({"message": "Product not found."}, status=404)
-
-            if product.default_account:
-                account_user_product = Account.objects.get(id=product.default_account.id)
-            else:
-                user_product = UserProfile.objects.get(id=product.user.id)
-                try:
-                    account_user_product = Account.objects.filter(user=user_product).first()
-                except Account.DoesNotExist:
-                    logger.warning(f"Failed to process payment. Account not found.")
-                    return Response({"message": "Account not found."}, status=404)
-
-            account_user_product.balance += order_details.price
-            order.is_paid = True
-            order.is_in_the_card = False
-            order.status = OrderStatus.objects.get(id=3)
-            payment = Payment.objects.create(
-                order=order_details,
-                account=account,
-                user=user_profile,
-                amount=order_details.quantity,
-                price=order_details.price
-            )
+            payments = pay_basket(basket, account)
+        except PaymentError as e:
+            logger.warning(f"Failed to process payment for basket with ID {_id}: {e.message}")
+            return Response({"message": e.message}, status=e.status)
 
-            payment.save()
-            order.save()
-            account.save()
-            logger.info(f"Payment processed successfully for order with ID {_id}.")
-            serializer = PaymentSerializer(payment)
-            return Response(serializer.data, status=200)
-        else:
-            logger.warning(f"Failed to process payment. Insufficient funds for order with ID {_id}.")
-            return Response({"message": "You do not have enough funds to make the purchase"}, status=401)
+        logger.info(f"Payment processed successfully for basket with ID {_id}.")
+        serializer = PaymentSerializer(payments, many=True)
+        return Response(serializer.data, status=200)
+
+
+def filter_payments(payments, params):
+    if params.get('date_from'):
+        payments = payments.filter(payed_at__gte=params['date_from'])
+    if params.get('date_to'):
+        payments = payments.filter(payed_at__lt=params['date_to'])
+    return payments
 
 
 class OrderPaid(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -145,21 +153,82 @@ class OrderPaid(APIView):
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
                               type=openapi.TYPE_STRING),
         ],
+        query_serializer=PaymentQuerySerializer(),
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id, is_admin=False)
-        payments = Payment.objects.filter(user=user_profile, is_deleted=False)
-        if payments:
-            serializer = PaymentSerializer(payments, many=True)
-            return Response(serializer.data, status=200)
-        else:
+        query_serializer = PaymentQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        user_profile = get_user_profile(request)
+        if user_profile.is_admin:
             return Response({"message": "You don't have any payment"}, status=404)
+        # Served by the (user, payed_at, id) index of live payments, the page's order details,
+        # addresses and accounts are joined in.
+        payments = (Payment.objects.filter(user=user_profile, is_deleted=False)
+                    .select_related('order__address', 'account'))
+        paginator = KeysetPaginator(('-payed_at', '-id'), params.get('page_size') or settings.PAYMENT_PAGE_SIZE)
+        page, next_cursor = paginator.paginate(filter_payments(payments, params), params.get('cursor'))
+        if not page and not params.get('cursor'):
+            return Response({"message": "You don't have any payment"}, status=404)
+        serializer = PaymentSerializer(page, many=True)
+        return paginated_response(request, serializer.data, next_cursor)
+
+
+class PaymentStatement(APIView):
+    authentication_classes = [ProfileJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        query_serializer=PaymentStatementQuerySerializer(),
+        security=[],
+    )
+    def get(self, request):
+        query_serializer = PaymentStatementQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
+        payments = filter_payments(Payment.objects.filter(user_id=request.user.id, is_deleted=False), params)
+        rows = iter_statement_rows(payments)
+        logger.info(f"User with ID {request.user.id} exported a payment statement.")
+        if params['export'] == 'ndjson':
+            return streaming_json_response(rows, 'ndjson', filename='statement.ndjson')
+        return streaming_csv_response(list(STATEMENT_COLUMNS), (row.values() for row in rows),
+                                      filename='statement.csv')
+
+
+class SellerSettlements(APIView):
+    authentication_classes = [ProfileJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        security=[],
+    )
+    def get(self, request):
+        """Settled balance and sales not yet credited (pending) of each of the user's accounts."""
+        accounts = list(Account.objects.filter(user_id=request.user.id, is_deleted=False).order_by('id')
+                        .annotate(pending=Coalesce(Sum('settlements__amount',
+                                                       filter=Q(settlements__settled_at__isnull=True)),
+                                                   Value(Decimal(0)))))
+        serializer = AccountSettlementSerializer(accounts, many=True)
+        return Response({
+            "settled": sum(account.balance for account in accounts),
+            "pending": sum(account.pending for account in accounts),
+            "accounts": serializer.data,
+        }, status=200)
 
 
 class PayMentDetail(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -170,9 +239,8 @@ class PayMentDetail(APIView):
         security=[],
     )
     def delete(self, request, _id):
-        user_id = get_user_id_from_token(request)
         try:
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             payment = Payment.objects.get(id=_id, user=user_profile, is_deleted=False)
         except Payment.DoesNotExist:
             logger.warning(f"Failed to delete payment. Payment with ID {_id} not found.")
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Product, Account
+from .models import Product, Account, Store
 
 admin.site.register(Product)
+admin.site.register(Store)
 admin.site.register(Account)
@@ -0,0 +1,37 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from utils.cache import bump_generation, get_generation
+
+
+def listing_generation_key(shop_id):
+    return f'productapp:listing:generation:{shop_id}'
+
+
+def listing_cache_key(shop_id, scope, params):
+    """
+    Key of a product listing page. ``scope`` separates result sets that differ by who
+    is asking (anonymous, signed in, a seller looking at their own products) and the
+    shop's generation makes every key of that shop stale as soon as one of its products changes.
+    """
+    generation = get_generation(listing_generation_key(shop_id))
+    normalized = json.dumps([shop_id, scope, sorted(params.items())], cls=DjangoJSONEncoder)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f'productapp:listing:{shop_id}:{generation}:{digest}'
+
+
+def get_listing(key):
+    return cache.get(key)
+
+
+def set_listing(key, data, next_cursor, etag):
+    cache.set(key, (data, next_cursor, etag))
+
+
+def invalidate_product_listings(shop_id):
+    # Bumped after commit so a concurrent request can't re-cache the old rows under the new generation.
+    transaction.on_commit(lambda: bump_generation(listing_generation_key(shop_id)))
@@ -0,0 +1,45 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+
+def price_bucket_expression(edges):
+    whens = [When(price__lt=edge, then=Value(index)) for index, edge in enumerate(edges[1:])]
+    return Case(*whens, default=Value(len(edges) - 1), output_field=IntegerField())
+
+
+def product_facets(products):
+    """
+    Category counts and a price histogram for the filtered products, computed from a
+    single GROUP BY (category, price bucket) query and folded together in Python.
+    """
+    edges = settings.PRODUCT_PRICE_BUCKETS
+    rows = (products.order_by()
+            .annotate(price_bucket=price_bucket_expression(edges))
+            .values('category_id', 'category__category_name', 'price_bucket')
+            .annotate(count=Count('id')))
+
+    categories = {}
+    buckets = defaultdict(int)
+    for row in rows:
+        category = categories.setdefault(row['category_id'], {
+            'id': row['category_id'],
+            'category_name': row['category__category_name'],
+            'count': 0,
+        })
+        category['count'] += row['count']
+        buckets[row['price_bucket']] += row['count']
+
+    price = [
+        {
+            'min': edge,
+            'max': edges[index + 1] if index + 1 < len(edges) else None,
+            'count': buckets[index],
+        }
+        for index, edge in enumerate(edges)
+    ]
+    return {
+        'categories': sorted(categories.values(), key=lambda category: -category['count']),
+        'price': price,
+    }
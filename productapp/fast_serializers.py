@@ -0,0 +1,65 @@
+"""
+Read-only fast path for product listings.
+
+Produces exactly what ``ProductSerializer(products, many=True).data`` does, but from
+``values()`` rows and a single batched image query instead of model instances, a
+lazy ``images`` query per product and DRF field machinery.
+"""
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+
+from utils.streaming import chunked
+
+from .models import ProductImage
+from .renditions import rendition_urls
+
+PRODUCT_VALUES = ('id', 'user_id', 'shop_id', 'category_id', 'title', 'description', 'price', 'amount',
+                  'default_account_id', 'views')
+
+
+def serialize_images(product_ids):
+    images = defaultdict(list)
+    if not product_ids:
+        return images
+
+    rows = (ProductImage.objects.filter(product_id__in=product_ids).order_by('id')
+            .values_list('product_id', 'image', 'renditions'))
+    for product_id, image, renditions in rows:
+        images[product_id].append({
+            'image': default_storage.url(image) if image else None,
+            'renditions': rendition_urls(renditions),
+        })
+    return images
+
+
+def serialize_product_rows(rows):
+    """Serializes rows fetched with ``.values(*PRODUCT_VALUES)``."""
+    images = serialize_images([row['id'] for row in rows])
+    return [
+        {
+            'id': row['id'],
+            'user': row['user_id'],
+            'shop': row['shop_id'],
+            'category': row['category_id'],
+            'title': row['title'],
+            'description': row['description'],
+            'price': row['price'],
+            'amount': row['amount'],
+            'images': images[row['id']],
+            'default_account': row['default_account_id'],
+            'views': row['views'],
+        }
+        for row in rows
+    ]
+
+
+def serialize_products(products):
+    return serialize_product_rows(list(products.values(*PRODUCT_VALUES)))
+
+
+def iter_serialized_products(products, chunk_size):
+    """Serializes a large queryset chunk by chunk over a server-side cursor."""
+    rows = products.values(*PRODUCT_VALUES).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        yield from serialize_product_rows(chunk)
@@ -0,0 +1,93 @@
+"""
+Content-addressed synchronization of a product's images.
+
+An image is identified by the SHA-256 of its file, so re-uploading the same picture keeps the
+existing row, its stored file and its renditions instead of replacing them.
+"""
+import hashlib
+from urllib.parse import urlparse
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+
+from .models import ProductImage
+from .renditions import schedule_renditions
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def uploaded_images(data, field='cover_img'):
+    """
+    All images sent under ``field``, for multipart (repeated field) and JSON bodies alike. Files are
+    new uploads; strings name an image the product already has, as returned by the API.
+    """
+    if hasattr(data, 'getlist'):
+        return [upload for upload in data.getlist(field) if upload]
+    value = data.get(field)
+    if not value:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def stored_image_keys(product):
+    """Maps the name and URL of each of ``product``'s stored images to the key it is synced by."""
+    keys = {}
+    for image in product.images.all():
+        key = image.content_hash or image.image.name
+        keys[image.image.name] = keys[image.image.url] = keys[urlparse(image.image.url).path] = key
+    return keys
+
+
+def file_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def stored_file_hash(name):
+    with default_storage.open(name) as stored:
+        return file_hash(stored)
+
+
+def sync_product_images(product, uploads):
+    """
+    Makes ``product``'s images match ``uploads``: new files are inserted with one bulk_create,
+    images whose file is no longer sent are removed with one delete and the rest are left alone.
+
+    Raises InvalidImage, before anything is written, for a value that is neither a file nor one
+    of the product's stored images.
+    """
+    stored = None
+    wanted = {}
+    for upload in uploads:
+        if isinstance(upload, UploadedFile):
+            wanted.setdefault(file_hash(upload), upload)
+            continue
+        if stored is None:
+            stored = stored_image_keys(product)
+        if not isinstance(upload, str) or upload not in stored:
+            raise InvalidImage(f"{upload!r} is neither an uploaded file nor an image of this product.")
+        wanted.setdefault(stored[upload], None)
+
+    kept, stale = set(), []
+    for image_id, name, content_hash in product.images.order_by('id').values_list('id', 'image', 'content_hash'):
+        key = content_hash or name
+        if key in wanted and key not in kept:
+            kept.add(key)
+        else:
+            stale.append(image_id)
+
+    if stale:
+        ProductImage.objects.filter(id__in=stale).delete()
+
+    created = ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=upload, content_hash=content_hash)
+        for content_hash, upload in wanted.items()
+        if upload is not None and content_hash not in kept
+    ])
+    schedule_renditions(created)
+    return created, stale
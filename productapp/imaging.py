@@ -0,0 +1,25 @@
+import os
+
+from PIL import Image, ImageOps
+
+
+def render_renditions(source_path, output_dir, basename, sizes):
+    """Writes a JPEG and a WebP thumbnail of every size into output_dir and returns their file names."""
+    renditions = {}
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        for name, size in sizes.items():
+            image = original.copy()
+            image.thumbnail(size, Image.LANCZOS)
+
+            webp = f'{basename}_{name}.webp'
+            image.save(os.path.join(output_dir, webp), 'WEBP', quality=80, method=4)
+
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            jpeg = f'{basename}_{name}.jpg'
+            image.save(os.path.join(output_dir, jpeg), 'JPEG', quality=85, optimize=True, progressive=True)
+
+            renditions[name] = jpeg
+            renditions[f'{name}_webp'] = webp
+    return renditions
@@ -0,0 +1,153 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .cache import invalidate_product_listings
+from .images import stored_file_hash
+from .models import Account, Category, Product, ProductImage, Store
+from .renditions import schedule_renditions
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+
+class ProductImportSerializer(serializers.ModelSerializer):
+    # Same field rules as ProductSerializer, but relations and the unique description are
+    # checked once per batch by ProductImporter instead of with one query per row.
+    category = serializers.IntegerField()
+    default_account = serializers.IntegerField(required=False, allow_null=True)
+    images = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+
+    class Meta:
+        model = Product
+        fields = ['category', 'title', 'description', 'price', 'amount', 'default_account', 'images']
+        extra_kwargs = {'description': {'validators': []}}
+
+
+def read_rows(stream, file_format):
+    """Yields (row number, dict) pairs from a binary CSV or JSON Lines stream without loading it whole."""
+    text = codecs.iterdecode(stream, 'utf-8')
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            row = {key: value for key, value in row.items() if value not in (None, '')}
+            if 'images' in row:
+                row['images'] = [image for image in row['images'].split('|') if image]
+            yield number, row
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else {'__invalid__': line}
+
+
+class ProductImporter:
+    def __init__(self, user_profile, shop=None, batch_size=500):
+        self.user_profile = user_profile
+        self.shop = shop
+        self.batch_size = batch_size
+        self.accounts = set(Account.objects.filter(user=user_profile).values_list('id', flat=True))
+        self.fallback_account = min(self.accounts) if self.accounts else None
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        if self.shop is None:
+            self.shop = Store.default_for(self.user_profile)
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+
+        if self.created:
+            invalidate_product_listings(self.shop.id)
+        errors = sorted(self.errors, key=lambda error: error['row'])
+        return {"created": self.created, "failed": len(errors), "errors": errors}
+
+    def import_batch(self, batch):
+        valid = []
+        for number, row in batch:
+            if '__invalid__' in row:
+                self.errors.append({"row": number, "errors": {"non_field_errors": ["Invalid JSON object."]}})
+                continue
+            serializer = ProductImportSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((number, serializer.validated_data))
+            else:
+                self.errors.append({"row": number, "errors": serializer.errors})
+
+        categories = Category.objects.in_bulk({data['category'] for _, data in valid})
+        taken = set(Product.objects.filter(description__in=[data['description'] for _, data in valid])
+                    .values_list('description', flat=True))
+
+        products, images = [], []
+        for number, data in valid:
+            if data['category'] not in categories:
+                self.errors.append({"row": number, "errors": {"category": ["Category not found."]}})
+                continue
+            if data['description'] in taken:
+                self.errors.append({"row": number, "errors": {"description": ["Product with this description "
+                                                                              "already exists."]}})
+                continue
+            default_account = data.get('default_account')
+            if default_account is None:
+                default_account = self.fallback_account
+            elif default_account not in self.accounts:
+                self.errors.append({"row": number, "errors": {"default_account": ["Account not found."]}})
+                continue
+
+            row_images = {}
+            try:
+                for image in data.get('images', []):
+                    row_images.setdefault(stored_file_hash(image), image)
+            except (OSError, SuspiciousFileOperation):
+                self.errors.append({"row": number, "errors": {"images": [f"Image {image} not found."]}})
+                continue
+            taken.add(data['description'])
+
+            products.append((number, Product(
+                user=self.user_profile,
+                shop=self.shop,
+                category_id=data['category'],
+                title=data['title'],
+                description=data['description'],
+                price=data['price'],
+                amount=data['amount'],
+                default_account_id=default_account,
+            )))
+            images.append(row_images)
+
+        if not products:
+            return
+
+        try:
+            self.insert(products, images)
+        except IntegrityError:
+            # Rejected by a constraint the checks above can't see (e.g. a concurrent import):
+            # insert row by row so only the offending rows fail.
+            for row, row_images in zip(products, images):
+                try:
+                    self.insert([row], [row_images])
+                except IntegrityError as e:
+                    self.errors.append({"row": row[0], "errors": {"non_field_errors": [str(e)]}})
+
+    @transaction.atomic
+    def insert(self, products, images):
+        created = Product.objects.bulk_create([product for _, product in products])
+        created_images = ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=image, content_hash=content_hash)
+            for product, product_images in zip(created, images)
+            for content_hash, image in product_images.items()
+        ])
+        schedule_renditions(created_images)
+        self.created += len(created)
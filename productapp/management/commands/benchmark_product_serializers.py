@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from productapp.fast_serializers import serialize_products
+from productapp.models import Product
+from productapp.serializers import ProductSerializer
+
+
+def normalize(data):
+    # Images of one product have no defined order in ProductSerializer, compare them as sets.
+    data = json.loads(json.dumps(data))
+    for product in data:
+        product['images'].sort(key=lambda image: json.dumps(image, sort_keys=True))
+    return data
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = "Compare ProductSerializer with the values()-based fast path on the first N catalog products."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[30, 300, 3000])
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per size, the best one is reported")
+
+    def measure(self, serialize, repeat):
+        best, queries, data = None, 0, None
+        for _ in range(repeat):
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                data = serialize()
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            queries = counter.count
+        return best, queries, data
+
+    def handle(self, *args, **options):
+        total = Product.objects.count()
+        for size in options['sizes']:
+            if size > total:
+                raise CommandError(f"Only {total} products in the catalog, can't benchmark {size} rows.")
+
+            products = Product.objects.order_by('id')[:size]
+            drf_time, drf_queries, drf_data = self.measure(
+                lambda: ProductSerializer(products.all(), many=True).data, options['repeat'])
+            fast_time, fast_queries, fast_data = self.measure(
+                lambda: serialize_products(products.all()), options['repeat'])
+
+            if normalize(drf_data) != normalize(fast_data):
+                raise CommandError(f"Fast path output differs from ProductSerializer for {size} rows.")
+
+            self.stdout.write(
+                f"{size:>6} rows  ProductSerializer {drf_time * 1000:9.1f} ms / {drf_queries:5} queries  "
+                f"fast path {fast_time * 1000:8.1f} ms / {fast_queries} queries  "
+                f"speedup x{drf_time / fast_time:.1f}"
+            )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from jobapp.jobs import enqueue_many
+from productapp.models import ProductImage
+
+ENQUEUE_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ("Queue productapp.render_image jobs for product images that don't have renditions yet. "
+            "The renditions are generated by python manage.py run_jobs.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate renditions for every image")
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.exclude(image='')
+        if not options['all']:
+            images = images.filter(renditions={})
+
+        queued, batch = 0, []
+        for image_id in images.values_list('id', flat=True).iterator():
+            batch.append({'image_id': image_id})
+            if len(batch) == ENQUEUE_BATCH_SIZE:
+                queued += len(enqueue_many('productapp.render_image', batch))
+                batch = []
+        if batch:
+            queued += len(enqueue_many('productapp.render_image', batch))
+
+        self.stdout.write(self.style.SUCCESS(f"Queued renditions for {queued} images."))
@@ -0,0 +1,50 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from productapp.importer import IMPORT_FORMATS, ProductImporter, read_rows
+from productapp.models import Store
+from userapp.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = "Bulk import products for a seller from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON Lines file, '-' for stdin")
+        parser.add_argument('--user', type=int, required=True, help="ID of the seller that owns the products")
+        parser.add_argument('--shop', type=int, help="ID of one of the seller's stores to list the products in")
+        parser.add_argument('--input-format', choices=IMPORT_FORMATS,
+                            help="Defaults to jsonl for .jsonl/.ndjson files and csv otherwise")
+        parser.add_argument('--batch-size', type=int, default=settings.PRODUCT_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user_profile = UserProfile.objects.get(id=options['user'])
+        except UserProfile.DoesNotExist:
+            raise CommandError(f"User with ID {options['user']} not found.")
+
+        shop = None
+        if options['shop'] is not None:
+            try:
+                shop = Store.objects.get(id=options['shop'], owner=user_profile, deleted_at__isnull=True)
+            except Store.DoesNotExist:
+                raise CommandError(f"Store with ID {options['shop']} not found for user {user_profile.id}.")
+
+        importer = ProductImporter(user_profile, shop=shop, batch_size=options['batch_size'])
+        if importer.fallback_account is None:
+            raise CommandError(f"User with ID {user_profile.id} has no account to receive payments.")
+
+        path = options['path']
+        file_format = options['input_format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        if path == '-':
+            report = importer.run(read_rows(sys.stdin.buffer, file_format))
+        else:
+            with open(path, 'rb') as stream:
+                report = importer.run(read_rows(stream, file_format))
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {report['created']} products, {report['failed']} rows failed."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from productapp.models import Product
+from productapp.search import product_search_vector
+
+
+class Command(BaseCommand):
+    help = "Recompute Product.search_vector for the whole catalog in primary key batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Products updated per statement")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+
+            updated += Product.objects.filter(id__gte=ids[0], id__lte=ids[-1]).update(
+                search_vector=product_search_vector()
+            )
+            last_id = ids[-1]
+            self.stdout.write(f"Indexed products up to ID {last_id} ({updated} total).")
+
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt for {updated} products."))
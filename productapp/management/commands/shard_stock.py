@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from productapp.models import Product
+from productapp.stock import shard_stock
+
+
+class Command(BaseCommand):
+    help = "Spread a flash-sale product's stock over several rows, or fold it back with --shards 0."
+
+    def add_arguments(self, parser):
+        parser.add_argument('product', type=int, help="ID of the product")
+        parser.add_argument('--shards', type=int, required=True)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['shards'] <= 256:
+            raise CommandError("--shards must be between 0 and 256.")
+        try:
+            product = shard_stock(options['product'], options['shards'])
+        except Product.DoesNotExist:
+            raise CommandError(f"Product with ID {options['product']} not found.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Product {product.id}: {product.amount} units in {product.stock_shard_count or 'no'} shards."))
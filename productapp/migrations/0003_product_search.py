@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:34
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER = """
+CREATE FUNCTION productapp_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english'::regconfig, COALESCE(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, COALESCE(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER productapp_product_search_vector
+    BEFORE INSERT OR UPDATE OF title, description ON productapp_product
+    FOR EACH ROW EXECUTE FUNCTION productapp_product_search_vector_update();
+
+UPDATE productapp_product SET
+    search_vector = setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B');
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER IF EXISTS productapp_product_search_vector ON productapp_product;
+DROP FUNCTION IF EXISTS productapp_product_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('categoryapp', '0001_initial'),
+        ('productapp', '0002_initial'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='product_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('categoryapp', '0001_initial'),
+        ('productapp', '0003_product_search'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['-views', '-id'], name='product_views_id_idx'),
+        ),
+    ]
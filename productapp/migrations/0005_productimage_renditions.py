@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productapp', '0004_product_views_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
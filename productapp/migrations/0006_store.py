@@ -0,0 +1,46 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountapp', '0002_initial'),
+        ('categoryapp', '0001_initial'),
+        ('productapp', '0005_productimage_renditions'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_views_id_idx',
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='owner',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stores', to='userapp.userprofile'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='shop',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='products', to='productapp.store'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['shop', '-views', '-id'], name='product_shop_views_id_idx'),
+        ),
+    ]
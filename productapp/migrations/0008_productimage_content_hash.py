@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:47
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_images(apps, schema_editor):
+    ProductImage = apps.get_model('productapp', 'ProductImage')
+    for image in ProductImage.objects.exclude(image='').iterator():
+        digest = hashlib.sha256()
+        try:
+            with image.image.open('rb') as stored:
+                for chunk in stored.chunks():
+                    digest.update(chunk)
+        except OSError:
+            # Missing files keep an empty hash and are replaced on the next image update.
+            continue
+        ProductImage.objects.filter(id=image.id).update(content_hash=digest.hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productapp', '0007_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['product', 'content_hash'], name='productimage_product_hash_idx'),
+        ),
+        migrations.RunPython(hash_existing_images, migrations.RunPython.noop),
+    ]
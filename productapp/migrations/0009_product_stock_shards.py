@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productapp', '0008_productimage_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ProductStockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('amount', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='productapp.product')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='productstockshard',
+            constraint=models.UniqueConstraint(fields=('product', 'shard'), name='product_stock_shard_unique'),
+        ),
+    ]
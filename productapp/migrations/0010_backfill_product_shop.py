@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def assign_default_stores(apps, schema_editor):
+    Product = apps.get_model('productapp', 'Product')
+    Store = apps.get_model('productapp', 'Store')
+    UserProfile = apps.get_model('userapp', 'UserProfile')
+    # Products listed before stores existed would never show up in a per-shop listing.
+    sellers = Product.objects.filter(shop__isnull=True, user__isnull=False).values_list('user', flat=True)
+    for owner in UserProfile.objects.filter(id__in=sellers).iterator():
+        store = Store.objects.filter(owner=owner, deleted_at__isnull=True).order_by('id').first()
+        if store is None:
+            store = Store.objects.create(owner=owner, name=owner.username[:100], description='')
+        Product.objects.filter(shop__isnull=True, user=owner).update(shop=store)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productapp', '0009_product_stock_shards'),
+        ('userapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_default_stores, migrations.RunPython.noop),
+    ]
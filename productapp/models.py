@@ -1,42 +1,88 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Q
 from userapp.models import UserProfile
 from accountapp.models import Account
 from categoryapp.models import Category
 
 
-# class Store(models.Model):
-#     name = models.CharField(max_length=100)
-#     description = models.TextField()
-#     hash_password = models.CharField(max_length=100)
-#     ownerId = models.IntegerField(unique=True)
-#     owner = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True)
-#     created_at = models.DateTimeField(auto_now_add=True)
-#     updated_at = models.DateTimeField(auto_now=True)
-#     deleted_at = models.DateTimeField(null=True)
-#
-#     def __str__(self):
-#         return self.name
+class Store(models.Model):
+    name = models.CharField(max_length=100)
+    description = models.TextField()
+    owner = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True, related_name='stores')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def default_for(cls, owner):
+        # Products listed without a store go to the seller's oldest live store, catalogs are per shop.
+        store = cls.objects.filter(owner=owner, deleted_at__isnull=True).order_by('id').first()
+        return store or cls.objects.create(owner=owner, name=owner.username[:100], description='')
 
 
 class Product(models.Model):
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True)
+    shop = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, related_name='products')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='categories')
     title = models.CharField(max_length=100)
     description = models.TextField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     price = models.FloatField()
     amount = models.IntegerField()
+    # Number of ProductStockShard rows holding the stock, 0 when it lives in amount (see productapp.stock)
+    stock_shard_count = models.PositiveSmallIntegerField(default=0)
     default_account = models.ForeignKey(Account, on_delete=models.CASCADE, null=True, default=None)
     is_deleted = models.BooleanField(default=False)
     views = models.IntegerField(default=0)
+    # Maintained by the productapp_product_search_vector trigger, see productapp.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            GinIndex(fields=['title'], name='product_title_trgm_idx', opclasses=['gin_trgm_ops']),
+            # Every catalog query is scoped to one shop, so the shop leads the listing index and a
+            # shop's pages are a contiguous range of it.
+            models.Index(fields=['shop', '-views', '-id'], name='product_shop_views_id_idx',
+                         condition=Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ProductStockShard(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_shards')
+    shard = models.PositiveSmallIntegerField()
+    amount = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='product_stock_shard_unique'),
+        ]
+
+    def __str__(self):
+        return f"Shard {self.shard} of {self.product_id}: {self.amount}"
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, related_name='images')
     image = models.ImageField(upload_to="product_images/")
+    # Rendition name -> storage path, filled in by productapp.renditions
+    renditions = models.JSONField(default=dict, blank=True)
+    # SHA-256 of the file, lets productapp.images keep unchanged images on update
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'content_hash'], name='productimage_product_hash_idx'),
+        ]
 
     def __str__(self):
         return f"Image for {self.product.title}"
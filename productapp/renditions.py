@@ -0,0 +1,41 @@
+"""
+Thumbnail/WebP renditions of ProductImage files.
+
+Uploads only enqueue a ``productapp.render_image`` job; the renditions are generated by the
+job worker (python manage.py run_jobs). Until a rendition exists ProductImage.renditions is
+empty and clients fall back to the original image.
+"""
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobapp.jobs import enqueue_many
+
+from .models import Product, ProductImage
+
+RENDITIONS_DIR = 'product_images/renditions/'
+
+
+def rendition_urls(renditions):
+    return {name: default_storage.url(path) for name, path in (renditions or {}).items()}
+
+
+def rendition_args(image_id, image_name):
+    output_dir = default_storage.path(RENDITIONS_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    basename = os.path.splitext(os.path.basename(image_name))[0] + f'_{image_id}'
+    return default_storage.path(image_name), output_dir, basename, settings.PRODUCT_IMAGE_RENDITIONS
+
+
+def save_renditions(image_id, renditions):
+    renditions = {name: RENDITIONS_DIR + path for name, path in renditions.items()}
+    ProductImage.objects.filter(id=image_id).update(renditions=renditions)
+    # Renditions are part of the product's representation, so its ETag has to change.
+    Product.objects.filter(images__id=image_id).update(updated_at=timezone.now())
+
+
+def schedule_renditions(images):
+    """Enqueues rendition generation for ProductImage instances in the current transaction."""
+    enqueue_many('productapp.render_image', [{'image_id': image.id} for image in images if image.image])
@@ -0,0 +1,32 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+# Must match the text search configuration used by the productapp_product_search_vector
+# trigger (migration 0003_product_search), otherwise queries won't match the stored vectors.
+SEARCH_CONFIG = 'english'
+
+
+def product_search_vector():
+    return (SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector('description', weight='B', config=SEARCH_CONFIG))
+
+
+def search_products(products, search_query):
+    """
+    Ranked full-text search over title and description, falling back to trigram
+    similarity on the title when nothing matches (typos, partial words).
+    Returns the filtered queryset annotated with ``rank``.
+
+    Both rank functions return float4; ``rank`` is cast to float8 so the value survives the
+    JSON round-trip of a listing cursor exactly and the boundary row isn't returned again.
+    """
+    query = SearchQuery(search_query, config=SEARCH_CONFIG, search_type='websearch')
+    matches = products.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+    if matches.exists():
+        return matches
+
+    return products.filter(title__trigram_similar=search_query).annotate(
+        rank=Cast(TrigramSimilarity('title', search_query), FloatField())
+    )
@@ -1,15 +1,29 @@
 from rest_framework import serializers
 from productapp.models import *
 from categoryapp.serializers import CategorySerializer
+from productapp.renditions import rendition_urls
+from utils.streaming import STREAM_FORMATS
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to="product_images/")
+    renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ['image']
+        fields = ['image', 'renditions']
+
+    def get_renditions(self, obj):
+        return rendition_urls(obj.renditions)
+
+
+class StoreSerializer(serializers.ModelSerializer):
+    owner = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Store
+        fields = ['id', 'owner', 'name', 'description', 'created_at', 'updated_at']
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -18,19 +32,27 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ['id', 'user', 'category', 'title', 'description', 'price', 'amount', 'images', 'default_account',
-                  "views"]
+        fields = ['id', 'user', 'shop', 'category', 'title', 'description', 'price', 'amount', 'images',
+                  'default_account', "views"]
 
 
 class ProductUpDateNewSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=UserProfile.objects.all(), required=False)
     images = ProductImageSerializer(many=True, read_only=True)
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    shop = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Product
-        fields = ['id', 'user', 'category', 'title', 'description', 'price', 'amount', 'images', 'default_account',
-                  "views"]
+        fields = ['id', 'user', 'shop', 'category', 'title', 'description', 'price', 'amount', 'images',
+                  'default_account', "views"]
+
+    def update(self, instance, validated_data):
+        # Write only the fields that were sent, so a concurrent checkout's stock decrement isn't overwritten.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
 
 
 class ProductUpdateSerializer(serializers.Serializer):
@@ -52,3 +74,15 @@ class ProductQuerySerializer(serializers.Serializer):
     min_price = serializers.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2)
     max_price = serializers.DecimalField(required=False, min_value=0, max_digits=10, decimal_places=2)
     category = serializers.CharField(required=False)
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor from the X-Next-Cursor header")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=100)
+    facets = serializers.BooleanField(default=False, help_text="Wrap the page as {results, facets} with category "
+                                                              "counts and a price histogram")
+
+
+class ProductUserQuerySerializer(serializers.Serializer):
+    stream = serializers.ChoiceField(choices=list(STREAM_FORMATS), required=False,
+                                     help_text="Stream every product as one JSON array or as JSON Lines "
+                                               "instead of returning a page")
+    cursor = serializers.CharField(required=False, help_text="Opaque cursor from the X-Next-Cursor header")
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=100)
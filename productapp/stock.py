@@ -0,0 +1,141 @@
+"""
+Atomic stock accounting.
+
+Stock is taken with a single conditional ``UPDATE ... WHERE amount >= n RETURNING amount``,
+so concurrent checkouts can't oversell and only the stock columns are written. A product
+that sells out is hidden (``is_deleted``) by the same statement.
+
+Flash-sale products can be switched to sharded mode with ``shard_stock``: the stock is
+spread over ``ProductStockShard`` rows and each sale decrements a random shard that no
+other checkout is holding, so concurrent buyers lock different rows. While a product is sharded
+``Product.amount`` keeps the amount it was sharded with and is only set to 0 once every
+shard is empty; ``shard_stock(product_id, 0)`` folds the shards back into it.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Product, ProductStockShard
+
+TAKE_STOCK_SQL = f"""
+UPDATE {Product._meta.db_table}
+SET amount = amount - %(quantity)s,
+    is_deleted = is_deleted OR amount = %(quantity)s,
+    updated_at = now()
+WHERE id = %(product_id)s AND amount >= %(quantity)s AND NOT is_deleted AND stock_shard_count = 0
+RETURNING amount
+"""
+
+# SKIP LOCKED: a busy shard is never waited on. Waiting on one shard while holding another
+# (a failed conditional UPDATE still locks the row) is how concurrent checkouts deadlock.
+TAKE_SHARD_SQL = f"""
+UPDATE {ProductStockShard._meta.db_table}
+SET amount = amount - %(quantity)s
+WHERE id = (
+    SELECT id FROM {ProductStockShard._meta.db_table}
+    WHERE product_id = %(product_id)s AND amount >= %(quantity)s
+    ORDER BY random()
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING amount
+"""
+
+SELL_OUT_SQL = f"""
+UPDATE {Product._meta.db_table}
+SET amount = 0, is_deleted = TRUE, updated_at = now()
+WHERE id = %(product_id)s AND stock_shard_count > 0 AND NOT EXISTS (
+    SELECT 1 FROM {ProductStockShard._meta.db_table} WHERE product_id = %(product_id)s AND amount > 0
+)
+"""
+
+
+def take_stock(product, quantity):
+    """
+    Takes ``quantity`` units of ``product``. Returns the stock left (the product's amount,
+    or the shard's in sharded mode) or ``None`` when there isn't enough.
+    """
+    if quantity <= 0:
+        return None
+
+    with transaction.atomic():
+        if not product.stock_shard_count:
+            with connection.cursor() as cursor:
+                cursor.execute(TAKE_STOCK_SQL, {'product_id': product.id, 'quantity': quantity})
+                row = cursor.fetchone()
+            if row is not None:
+                return row[0]
+            # Sharded since the product was loaded?
+            product.stock_shard_count = (Product.objects.filter(id=product.id)
+                                         .values_list('stock_shard_count', flat=True).first() or 0)
+            if not product.stock_shard_count:
+                return None
+
+        return _take_sharded(product, quantity)
+
+
+def _take_sharded(product, quantity):
+    if product.is_deleted:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(TAKE_SHARD_SQL, {'product_id': product.id, 'quantity': quantity})
+        row = cursor.fetchone()
+        if row is not None:
+            if row[0] == 0:
+                cursor.execute(SELL_OUT_SQL, {'product_id': product.id})
+            return row[0]
+
+    return _take_across_shards(product, quantity)
+
+
+def _take_across_shards(product, quantity):
+    # Every shard is busy or none has enough left on its own: lock them all and take from
+    # several. Shards are always locked in shard order and before the product row.
+    held = list(ProductStockShard.objects.select_for_update().filter(product_id=product.id).order_by('shard'))
+    if not Product.objects.select_for_update().filter(id=product.id, stock_shard_count__gt=0).exists():
+        product.stock_shard_count = 0
+        return take_stock(product, quantity)
+
+    available = sum(shard.amount for shard in held)
+    if available < quantity:
+        if not available:
+            with connection.cursor() as cursor:
+                cursor.execute(SELL_OUT_SQL, {'product_id': product.id})
+        return None
+
+    needed = quantity
+    for shard in held:
+        if not shard.amount:
+            continue
+        taken = min(shard.amount, needed)
+        ProductStockShard.objects.filter(id=shard.id).update(amount=F('amount') - taken)
+        needed -= taken
+        if not needed:
+            break
+
+    if available == quantity:
+        with connection.cursor() as cursor:
+            cursor.execute(SELL_OUT_SQL, {'product_id': product.id})
+    return available - quantity
+
+
+@transaction.atomic
+def shard_stock(product_id, shards, amount=None):
+    """
+    Spreads the product's stock over ``shards`` rows, or moves it back into ``Product.amount``
+    when ``shards`` is 0. ``amount`` replaces the current stock (restocking a sharded product).
+    """
+    held = list(ProductStockShard.objects.select_for_update().filter(product_id=product_id).order_by('shard'))
+    product = Product.objects.select_for_update().get(id=product_id)
+    if amount is None:
+        amount = sum(shard.amount for shard in held) if product.stock_shard_count else product.amount
+    ProductStockShard.objects.filter(product=product).delete()
+
+    ProductStockShard.objects.bulk_create([
+        ProductStockShard(product=product, shard=shard, amount=amount // shards + (shard < amount % shards))
+        for shard in range(shards)
+    ])
+    product.amount = amount
+    product.stock_shard_count = shards
+    product.save(update_fields=['amount', 'stock_shard_count', 'updated_at'])
+    return product
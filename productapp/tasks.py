@@ -0,0 +1,13 @@
+from jobapp.jobs import task
+
+from .imaging import render_renditions
+from .models import ProductImage
+from .renditions import rendition_args, save_renditions
+
+
+@task('productapp.render_image')
+def render_image(image_id):
+    image_name = ProductImage.objects.filter(id=image_id).values_list('image', flat=True).first()
+    if not image_name:
+        return
+    save_renditions(image_id, render_renditions(*rendition_args(image_id, image_name)))
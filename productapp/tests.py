@@ -1,3 +1,280 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import threading
 
-# Tests
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accountapp.models import Account
+from categoryapp.models import Category
+from userapp.models import UserProfile
+
+from .images import file_hash
+from .models import Product, ProductImage, Store
+from .stock import shard_stock, take_stock
+from .view_counter import flush_views
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(user).access_token))
+    return client
+
+
+class ProductSearchPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        cls.shop = Store.objects.create(name='s', description='s', owner=cls.seller)
+        category = Category.objects.create(category_name='c', description='c')
+        for index in range(7):
+            Product.objects.create(user=cls.seller, category=category, shop=cls.shop, title='red lamp',
+                                   description=f'a red lamp for the desk {index} ' + 'x' * index, price=1,
+                                   amount=5)
+
+    def test_pages_do_not_repeat_the_boundary_row(self):
+        client = client_for(self.seller)
+
+        seen, cursor = [], None
+        for _ in range(10):
+            params = {'search': 'red lamp', 'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = client.get(f'/products/{self.shop.id}', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [product['id'] for product in response.json()]
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+
+        self.assertIsNone(cursor)
+        self.assertEqual(sorted(seen), sorted(Product.objects.values_list('id', flat=True)))
+
+
+class ProductImageUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        category = Category.objects.create(category_name='c', description='c')
+        cls.product = Product.objects.create(user=cls.seller, category=category, title='t', description='d',
+                                             price=1, amount=5)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.image = ProductImage.objects.create(product=self.product, content_hash='a' * 64,
+                                                 image=SimpleUploadedFile('lamp.png', b'lamp'))
+        self.client = client_for(self.seller)
+
+    def test_json_body_keeps_images_named_by_url(self):
+        response = self.client.put(f'/products/{self.product.id}/',
+                                   {'title': 'new', 'cover_img': [self.image.image.url]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerySetEqual(self.product.images.all(), [self.image])
+
+    def test_unknown_image_is_rejected(self):
+        response = self.client.put(f'/products/{self.product.id}/',
+                                   {'title': 'new', 'cover_img': ['product_images/other.png']}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertQuerySetEqual(self.product.images.all(), [self.image])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.title, 't')
+
+
+class ProductImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        Account.objects.create(user=cls.seller, account_number='seller-1', balance=0)
+        cls.category = Category.objects.create(category_name='c', description='c')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = client_for(self.seller)
+
+    def import_csv(self, *rows):
+        body = 'category,title,description,price,amount,images\n' + ''.join(
+            f'{self.category.id},t,{description},1,5,{images}\n' for description, images in rows)
+        return self.client.post('/products/import/', body, content_type='text/csv')
+
+    def test_empty_body_is_rejected(self):
+        response = self.client.post('/products/import/', b'', content_type='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_imported_images_get_their_content_hash(self):
+        name = default_storage.save('product_images/lamp.png', ContentFile(b'lamp'))
+
+        response = self.import_csv(('lamp', name), ('chair', 'product_images/missing.png'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [2])
+        image = ProductImage.objects.get()
+        self.assertEqual(image.content_hash, file_hash(ContentFile(b'lamp')))
+
+    def test_unknown_default_account_fails_its_row(self):
+        other = UserProfile.objects.create_user(username='other', password='x', age=30, is_admin=True)
+        account = Account.objects.create(user=other, account_number='other-1', balance=0)
+        body = ('category,title,description,price,amount,default_account\n'
+                f'{self.category.id},t,lamp,1,5,{account.id}\n')
+
+        response = self.client.post('/products/import/', body, content_type='text/csv')
+
+        self.assertEqual(response.json()['created'], 0)
+        self.assertEqual(response.json()['errors'], [{"row": 1, "errors": {"default_account": ["Account not found."]}}])
+
+    def test_multipart_without_a_file_is_rejected(self):
+        response = self.client.post('/products/import/', {'other': 'x'}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"message": "No file to import."})
+
+    def test_products_without_a_shop_are_listed_in_the_default_store(self):
+        response = self.import_csv(('lamp', ''))
+
+        self.assertEqual(response.status_code, 200)
+        store = Store.objects.get(owner=self.seller)
+        listing = self.client.get(f'/products/{store.id}')
+        self.assertEqual([product['description'] for product in listing.json()], ['lamp'])
+
+    def test_constraint_violation_fails_only_its_row(self):
+        def concurrent_import(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            # Another import lists the same product right after this batch checked the descriptions.
+            if not raced and '"productapp_product"."description" IN' in sql:
+                raced.append(Product.objects.create(user=self.seller, category=self.category, title='t',
+                                                    description='taken', price=1, amount=5))
+            return result
+
+        raced = []
+        with connection.execute_wrapper(concurrent_import):
+            response = self.import_csv(('fresh', ''), ('taken', ''), ('other', ''))
+
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [2])
+        self.assertEqual(Product.objects.count(), 3)
+
+
+@override_settings(REFERENCE_CACHE_CHECK_INTERVAL=3600, PRODUCT_VIEWS_FLUSH_THREAD=False)
+class ProductEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = UserProfile.objects.create_user(username='seller', password='x', age=30, is_admin=True)
+        cls.shop = Store.objects.create(name='s', description='s', owner=cls.seller)
+        category = Category.objects.create(category_name='c', description='c')
+        cls.products = [
+            Product.objects.create(user=cls.seller, category=category, shop=cls.shop, title='t',
+                                   description=f'd{index}', price=1, amount=5)
+            for index in range(5)
+        ]
+
+    def setUp(self):
+        caches['default'].clear()
+        flush_views()
+        self.client = client_for(self.seller)
+
+    def test_listing_etag_follows_the_view_order(self):
+        first = self.client.get(f'/products/{self.shop.id}')
+        self.assertEqual(self.client.get(f'/products/{self.shop.id}', HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+                         304)
+
+        # A view-count flush reorders the listing without bumping the shop's listing generation.
+        Product.objects.filter(id=self.products[0].id).update(views=10)
+        caches['default'].clear()
+        response = self.client.get(f'/products/{self.shop.id}', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['id'], self.products[0].id)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_product_detail(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/products/{self.products[0].id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_revalidations_are_not_counted_as_views(self):
+        product = self.products[0]
+        first = self.client.get(f'/products/{product.id}/')
+        self.assertEqual(self.client.get(f'/products/{product.id}/', HTTP_IF_NONE_MATCH=first['ETag']).status_code,
+                         304)
+        flush_views()
+
+        product.refresh_from_db()
+        self.assertEqual(product.views, 1)
+        self.assertNotIn('product-views-flusher', [thread.name for thread in threading.enumerate()])
+
+    def test_listing_is_served_from_the_cache(self):
+        # The first listing of a shop also creates its listing generation.
+        self.client.get(f'/products/{self.shop.id}')
+        caches['default'].clear()
+
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(f'/products/{self.shop.id}').status_code, 200)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(f'/products/{self.shop.id}').status_code, 200)
+
+    def test_product_update(self):
+        with self.assertNumQueries(8):
+            response = self.client.put(f'/products/{self.products[0].id}/', {'title': 'new'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ConcurrentStockTests(TransactionTestCase):
+    stock = 20
+    threads = 8
+    attempts = 5
+
+    def setUp(self):
+        category = Category.objects.create(category_name='c', description='c')
+        self.product = Product.objects.create(category=category, title='t', description='d', price=1,
+                                              amount=self.stock)
+
+    def sell(self):
+        sold = []
+        barrier = threading.Barrier(self.threads)
+
+        def checkout():
+            try:
+                barrier.wait()
+                for _ in range(self.attempts):
+                    with transaction.atomic():
+                        if take_stock(Product.objects.get(id=self.product.id), 1) is not None:
+                            sold.append(1)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=checkout) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return len(sold)
+
+    def assertSoldOut(self, sold):
+        self.assertEqual(sold, self.stock)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.amount, 0)
+        self.assertTrue(self.product.is_deleted)
+
+    def test_concurrent_checkouts_sell_out_without_overselling(self):
+        self.assertSoldOut(self.sell())
+
+    def test_concurrent_checkouts_on_sharded_stock(self):
+        shard_stock(self.product.id, 4)
+
+        self.assertSoldOut(self.sell())
+        self.assertEqual(sum(self.product.stock_shards.values_list('amount', flat=True)), 0)
@@ -4,6 +4,9 @@ from . import views
 urlpatterns = [
     path('<int:shop_id>', views.ProductList.as_view({"get": "list"}), name='products'),
     path('', views.ProductList.as_view({"put": "update"}), name='products'),
+    path('stores/', views.StoreList.as_view(), name='stores'),
+    path('stores/<int:_id>/', views.StoreDetail.as_view(), name='store_detail'),
+    path('import/', views.ProductImport.as_view(), name='product_import'),
     path('<int:_id>/', views.ProductDetail.as_view(), name='product_detail'),
     path('<int:user_id>/user/', views.ProductUser.as_view(), name='product_user'),
 ]
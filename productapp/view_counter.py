@@ -0,0 +1,103 @@
+"""
+Write-behind buffer for Product.views.
+
+Views are counted in worker memory and written out by a background thread with
+one ``UPDATE ... SET views = views + n`` per distinct increment, so reading a
+product never writes to its row. Up to PRODUCT_VIEWS_MAX_PENDING views or
+PRODUCT_VIEWS_FLUSH_INTERVAL seconds of views can be lost if a worker dies
+without running its exit hook. With PRODUCT_VIEWS_FLUSH_THREAD off no thread
+is started and the request that fills the buffer writes it out.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import Product
+
+logger = logging.getLogger('productapp.view_counter')
+
+_lock = threading.Lock()
+_pending = Counter()
+_pending_total = 0
+_wakeup = threading.Event()
+_flusher = None
+
+
+def _flush_interval():
+    return getattr(settings, 'PRODUCT_VIEWS_FLUSH_INTERVAL', 10)
+
+
+def _max_pending():
+    return getattr(settings, 'PRODUCT_VIEWS_MAX_PENDING', 1000)
+
+
+def _flush_thread():
+    return getattr(settings, 'PRODUCT_VIEWS_FLUSH_THREAD', True)
+
+
+def record_view(product_id):
+    global _pending_total
+    with _lock:
+        _pending[product_id] += 1
+        _pending_total += 1
+        total = _pending_total
+    if not _flush_thread():
+        if total >= _max_pending():
+            flush_views()
+        return
+    _ensure_flusher()
+    if total >= _max_pending():
+        _wakeup.set()
+
+
+def flush_views():
+    global _pending_total
+    with _lock:
+        if not _pending:
+            return 0
+        pending = dict(_pending)
+        _pending.clear()
+        _pending_total = 0
+
+    by_increment = defaultdict(list)
+    for product_id, count in pending.items():
+        by_increment[count].append(product_id)
+
+    try:
+        with transaction.atomic():
+            for count, product_ids in by_increment.items():
+                Product.objects.filter(id__in=product_ids).update(views=F('views') + count)
+    except Exception as e:
+        logger.error(f"Failed to flush product views, re-queueing them: {str(e)}")
+        with _lock:
+            _pending.update(pending)
+            _pending_total += sum(pending.values())
+        return 0
+    return sum(pending.values())
+
+
+def _run_flusher():
+    while True:
+        _wakeup.wait(_flush_interval())
+        _wakeup.clear()
+        close_old_connections()
+        flush_views()
+
+
+def _ensure_flusher():
+    # Started lazily so that every forked worker gets its own thread.
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name='product-views-flusher', daemon=True)
+            _flusher.start()
+
+
+atexit.register(flush_views)
@@ -1,19 +1,32 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from drf_yasg import openapi
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny
 from django.db import transaction
+from django.utils import timezone
 from .serializers import *
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 import logging
-from django.db.models import Q
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from .serializers import ProductUpdateSerializer, ProductSerializer
-from utils.tokens import get_user_id_from_token
+from .cache import get_listing, invalidate_product_listings, listing_cache_key, set_listing
+from .facets import product_facets
+from .fast_serializers import PRODUCT_VALUES, iter_serialized_products, serialize_product_rows
+from .images import InvalidImage, sync_product_images, uploaded_images
+from .importer import IMPORT_FORMATS, ProductImporter, read_rows
+from .models import ProductStockShard
+from .search import search_products
+from .stock import shard_stock
+from .view_counter import record_view
+from utils.conditional import conditional_response, make_etag, set_validators
+from utils.pagination import KeysetPaginator, paginated_response
+from utils.streaming import streaming_json_response
+from utils.tokens import get_user_profile
 from rest_framework.viewsets import ViewSet
 
 logger = logging.getLogger('productapp.views')
@@ -23,26 +36,34 @@ class ProductDetail(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [AllowAny]
 
-    def get_object(self, _id):
+    def get_queryset(self):
         try:
-            user_id = get_user_id_from_token(self.request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(self.request)
         except UserProfile.DoesNotExist:
-            return get_object_or_404(Product, id=_id)
-        return get_object_or_404(Product, id=_id, user=user_profile)
+            return Product.objects.all()
+        return Product.objects.filter(user=user_profile)
+
+    def get_object(self, _id):
+        return get_object_or_404(self.get_queryset(), id=_id)
 
-    @transaction.atomic
     def get(self, request, _id):
-        try:
-            product = self.get_object(_id)
-        except Http404:
+        version = self.get_queryset().filter(id=_id).values_list('updated_at', 'views').first()
+        if version is None:
             logger.error(f"Product with ID {_id} not found.")
             return Response({"message": f"Product Not Found"}, status=404)
 
-        serializer = ProductSerializer(product)
-        product.views += 1
-        product.save()
-        return Response(serializer.data, status=200)
+        # views is bumped by the view counter without touching updated_at, so only the ETag sees it.
+        updated_at, views = version
+        etag = make_etag(_id, updated_at, views)
+
+        response = conditional_response(request, etag, updated_at)
+        if response is not None:
+            # A revalidation isn't a view, the client already has the product.
+            return response
+
+        serializer = ProductSerializer(self.get_object(_id))
+        record_view(_id)
+        return set_validators(Response(serializer.data, status=200), etag, updated_at)
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -51,24 +72,29 @@ class ProductDetail(APIView):
         ],
         request_body=ProductUpdateSerializer,
     )
+    @transaction.atomic
     def put(self, request, _id):
-        product = self.get_object(_id)
+        # Same lock order as productapp.stock (shards, then the product), so checkouts can't take
+        # stock between the save and the re-spread of a sharded amount.
+        list(ProductStockShard.objects.select_for_update().filter(product_id=_id).order_by('shard'))
+        product = get_object_or_404(self.get_queryset().select_for_update(), id=_id)
         serializer = ProductUpDateNewSerializer(product, data=request.data, partial=True)
 
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        cover_imgs = request.data.get('cover_img')
-
-        #      
-        product.images.all().delete()
-
-        if cover_imgs:
-            for cover_img in cover_imgs:
-                ProductImage.objects.create(product=product, image=cover_img)
+        # Images are only touched when the request sends them, so e.g. a price edit does no image I/O.
+        if 'cover_img' in request.data:
+            try:
+                sync_product_images(product, uploaded_images(request.data))
+            except InvalidImage as e:
+                return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer.validated_data["category"] = product.category
         serializer.save()
+        if 'amount' in serializer.validated_data and product.stock_shard_count:
+            shard_stock(product.id, product.stock_shard_count, amount=product.amount)
+        invalidate_product_listings(product.shop_id)
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -84,8 +110,7 @@ class ProductDetail(APIView):
             logger.warning(f"Failed to delete product. Product with ID {_id} not found.")
             return Response({"message": "Product Not Found"}, status=404)
 
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
 
         if product.is_deleted and not user_profile.is_admin:
             logger.warning(
@@ -94,6 +119,7 @@ class ProductDetail(APIView):
 
         product.is_deleted = True
         product.save()
+        invalidate_product_listings(product.shop_id)
         logger.info(f"Product with ID {_id} marked as deleted.")
         return Response({"message": "The product has been successfully removed"}, status=200)
 
@@ -102,6 +128,60 @@ class ProductList(ViewSet):
     authentication_classes = [SessionAuthentication]
     permission_classes = [AllowAny]
 
+    def filter_products(self, products, params):
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        categories = params.get('category')
+        search_query = params.get('search')
+
+        if min_price is not None:
+            products = products.filter(price__gte=min_price)
+        if max_price is not None:
+            products = products.filter(price__lte=max_price)
+        if categories:
+            category = Category.objects.get(id=categories)
+            products = products.filter(category=category)
+
+        if search_query:
+            return search_products(products, search_query)
+        return products
+
+    def list_products(self, request, products, shop_id, scope, params):
+        cache_key = listing_cache_key(shop_id, scope, params)
+        cached = get_listing(cache_key)
+        if cached is None:
+            try:
+                cached = self.build_listing(cache_key, products, params)
+            except Category.DoesNotExist:
+                return Response({"message": "Category not found"}, status=404)
+
+        data, next_cursor, etag = cached
+        response = conditional_response(request, etag)
+        if response is not None:
+            return response
+        return set_validators(paginated_response(request, data, next_cursor), etag)
+
+    def build_listing(self, cache_key, products, params):
+        products = self.filter_products(products, params)
+
+        if params.get('search'):
+            ordering = ('-rank', '-views', '-id')
+            rows = products.values(*PRODUCT_VALUES, 'rank')
+        else:
+            ordering = ('-views', '-id')
+            rows = products.values(*PRODUCT_VALUES)
+        paginator = KeysetPaginator(ordering, params.get('page_size') or settings.PRODUCT_PAGE_SIZE)
+        page, next_cursor = paginator.paginate(rows, params.get('cursor'))
+        data = serialize_product_rows(page)
+        if params.get('facets'):
+            data = {"results": data, "facets": product_facets(products)}
+
+        # Taken from the page itself: view counts reorder the listing without bumping the shop's
+        # listing generation, so a key-based ETag would outlive the order it was sent with.
+        etag = make_etag(data, next_cursor)
+        set_listing(cache_key, data, next_cursor, etag)
+        return data, next_cursor, etag
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
@@ -110,68 +190,27 @@ class ProductList(ViewSet):
         query_serializer=ProductQuerySerializer(),
     )
     def list(self, request, shop_id):
-        query_data = request.query_params.copy()
-        query_data['shop_id'] = shop_id
-
         query_serializer = ProductQuerySerializer(data=request.query_params)
         query_serializer.is_valid(raise_exception=True)
 
-        show_own_products = query_serializer.validated_data.get('show_own_products', False)
-        search_query = query_serializer.validated_data.get('search', None)
-        min_price = query_serializer.validated_data.get('min_price')
-        max_price = query_serializer.validated_data.get('max_price')
-        categories = query_serializer.validated_data.get('category')
+        params = query_serializer.validated_data
+        show_own_products = params.get('show_own_products', False)
 
         try:
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
 
             products = Product.objects.filter(is_deleted=False, amount__gt=0, shop_id=shop_id)
-            if user_profile.is_admin and not show_own_products:
-                products = products.filter(is_deleted=False, amount__gt=0)
-            elif user_profile.is_admin and show_own_products:
-                products = products.filter(user=user_profile, is_deleted=False, amount__gt=0)
-
-            if search_query:
-                products = products.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
-
-            if min_price is not None:
-                products = products.filter(price__gte=min_price)
-            if max_price is not None:
-                products = products.filter(price__lte=max_price)
-            if categories:
-                try:
-                    category = Category.objects.get(id=categories)
-                    products = products.filter(category=category)
-                except Category.DoesNotExist:
-                    return Response({"message": "Category not found"}, status=404)
-
-            products = products.order_by('-views')[:30]
-            serializer = ProductSerializer(products, many=True)
-
-            return Response(serializer.data, status=200)
+            scope = 'in_stock'
+            if user_profile.is_admin and show_own_products:
+                # Personalised result set, cached per seller.
+                products = products.filter(user=user_profile)
+                scope = f'own:{user_profile.id}'
+
+            return self.list_products(request, products, shop_id, scope, params)
 
         except UserProfile.DoesNotExist:
             products = Product.objects.filter(is_deleted=False, shop_id=shop_id)
-
-            if search_query:
-                products = products.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
-
-            if min_price is not None:
-                products = products.filter(price__gte=min_price)
-            if max_price is not None:
-                products = products.filter(price__lte=max_price)
-            if categories:
-                try:
-                    category = Category.objects.get(id=categories)
-                    products = products.filter(category=category)
-                except Category.DoesNotExist:
-                    return Response({"message": "Category not found"}, status=404)
-
-            products = products.order_by('-views')[:30]
-            serializer = ProductSerializer(products, many=True)
-            return Response(serializer.data, status=200)
-
+            return self.list_products(request, products, shop_id, 'public', params)
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
@@ -185,7 +224,8 @@ class ProductList(ViewSet):
                 'description': openapi.Schema(type=openapi.TYPE_STRING, description="Description of the item"),
                 'price': openapi.Schema(type=openapi.TYPE_INTEGER, description="Price of the item"),
                 'amount': openapi.Schema(type=openapi.TYPE_INTEGER, description="Amount of the item"),
-                'default_account': openapi.Schema(type=openapi.TYPE_INTEGER, description="Default account for money")
+                'default_account': openapi.Schema(type=openapi.TYPE_INTEGER, description="Default account for money"),
+                'store_id': openapi.Schema(type=openapi.TYPE_INTEGER, description="ID of the store to list the item in")
             },
             required=['category', 'title', 'description', 'price', 'amount']
         ),
@@ -195,14 +235,9 @@ class ProductList(ViewSet):
     def update(self, request):
         try:
             # Get the array of images from the request data
-            cover_imgs = request.data.get('cover_img')
-            if cover_imgs:
-                pass
-            else:
-                cover_imgs = []
+            cover_imgs = uploaded_images(request.data)
             # Get the user profile based on the token or however you identify the user
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
 
             # Check if the user is an admin
             if not user_profile.is_admin:
@@ -218,9 +253,15 @@ class ProductList(ViewSet):
                 'price': request.data.get('price'),
                 'amount': request.data.get('amount'),
                 'default_account': request.data.get('default_account'),
-                'related_store': request.data.get('store_id')
+                'shop': request.data.get('store_id')
             }
 
+            if data['shop'] is not None and not Store.objects.filter(id=data['shop'], owner=user_profile,
+                                                                     deleted_at__isnull=True).exists():
+                raise PermissionDenied("You can only add products to your own stores.")
+            if data['shop'] is None:
+                data['shop'] = Store.default_for(user_profile).id
+
             # Log request data
             logger.info(f"Request data - User: {user_profile.username}, Data: {data}, Cover Images: {cover_imgs}")
 
@@ -234,13 +275,11 @@ class ProductList(ViewSet):
                         try:
                             account = Account.objects.get(id=data["default_account"], user=user_profile)
                         except Account.DoesNotExist:
-                            user_id = get_user_id_from_token(request)
                             logger.warning(
-                                f"Failed to retrieve products for user with ID {user_id}. Account Not Found.")
+                                f"Failed to retrieve products for user with ID {user_profile.id}. Account Not Found.")
                             data["default_account"] = account.id
             except Account.DoesNotExist:
-                user_id = get_user_id_from_token(request)
-                logger.warning(f"Failed to create product for user with ID {user_id}. Account Not Found.")
+                logger.warning(f"Failed to create product for user with ID {user_profile.id}. Account Not Found.")
                 return Response({"warning": "You are have not account please create account and replay."},
                                 status=status.HTTP_404_NOT_FOUND)
             serializer = ProductSerializer(data=data)
@@ -249,8 +288,8 @@ class ProductList(ViewSet):
                 product = serializer.save()
 
                 # Save each image in the cover_imgs array
-                for cover_img in cover_imgs:
-                    ProductImage.objects.create(product=product, image=cover_img)
+                sync_product_images(product, cover_imgs)
+                invalidate_product_listings(product.shop_id)
 
                 # Log information including user details, product ID, and image details
                 logger.info(
@@ -264,26 +303,194 @@ class ProductList(ViewSet):
         except PermissionDenied as pd:
             logger.warning("Permission Denied: " + str(pd) + "")
             return Response({"Permission Denied": str(pd)}, status=status.HTTP_403_FORBIDDEN)
+        except InvalidImage as e:
+            # The product row is already saved; don't commit it without its images.
+            transaction.set_rollback(True)
+            logger.warning(f"Invalid image: {e}")
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"An error occurred: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class ProductUser(APIView):
+    @swagger_auto_schema(query_serializer=ProductUserQuerySerializer())
     def get(self, request, user_id):
+        query_serializer = ProductUserQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        params = query_serializer.validated_data
+
         try:
             user_profile = UserProfile.objects.get(id=user_id)
-            products = Product.objects.filter(user=user_profile)
+            products = Product.objects.filter(user=user_profile, is_deleted=False)
 
-            if not products.exists():
+            if params.get('stream'):
+                items = iter_serialized_products(products.order_by('id'), settings.PRODUCT_STREAM_CHUNK_SIZE)
+                return streaming_json_response(items, params['stream'])
+
+            paginator = KeysetPaginator(('id',), params.get('page_size') or settings.PRODUCT_PAGE_SIZE)
+            page, next_cursor = paginator.paginate(products.values(*PRODUCT_VALUES), params.get('cursor'))
+            if not page and not params.get('cursor'):
                 return Response({"message": f"No products found for the user with id {user_id}"},
                                 status=status.HTTP_404_NOT_FOUND)
 
-            serializer = ProductSerializer(products, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return paginated_response(request, serialize_product_rows(page), next_cursor)
+        except ValidationError:
+            raise
         except UserProfile.DoesNotExist:
             logger.warning(f"Failed to get user profile. User profile not found.")
             return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"An error occurred while processing the request: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ProductImport(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    def get_stream(self, request):
+        if request.content_type.startswith('multipart/'):
+            # The multipart parser has already consumed the body, only the file part is left.
+            upload = request.FILES.get('file')
+            if upload is None:
+                return None, None
+            file_format = 'jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+            return upload.file, file_format
+
+        file_format = 'csv' if 'csv' in request.content_type else 'jsonl'
+        return request.stream, file_format
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('shop_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="ID of one of your stores to list the imported products in"),
+            openapi.Parameter('input_format', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(IMPORT_FORMATS),
+                              description="Overrides the format detected from the file name or Content-Type"),
+            openapi.Parameter('file', openapi.IN_FORM, type=openapi.TYPE_FILE,
+                              description="CSV (category,title,description,price,amount,default_account,images "
+                                          "separated by |) or JSON Lines file. The raw request body can be sent "
+                                          "instead with a text/csv or application/x-ndjson Content-Type."),
+        ],
+        consumes=['multipart/form-data', 'text/csv', 'application/x-ndjson'],
+    )
+    def post(self, request):
+        try:
+            user_profile = get_user_profile(request)
+        except UserProfile.DoesNotExist:
+            return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not user_profile.is_admin:
+            logger.warning(f"User with ID {user_profile.id} attempted a product import without permission.")
+            return Response({"Permission Denied": "You don't have permission to create a product."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        shop = None
+        shop_id = request.query_params.get('shop_id')
+        if shop_id is not None:
+            try:
+                shop = Store.objects.get(id=shop_id, owner=user_profile, deleted_at__isnull=True)
+            except (Store.DoesNotExist, ValueError):
+                return Response({"message": "Store not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        importer = ProductImporter(user_profile, shop=shop, batch_size=settings.PRODUCT_IMPORT_BATCH_SIZE)
+        if importer.fallback_account is None:
+            return Response({"warning": "You are have not account please create account and replay."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        stream, file_format = self.get_stream(request)
+        if stream is None:
+            return Response({"message": "No file to import."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.query_params.get('input_format', file_format)
+        if file_format not in IMPORT_FORMATS:
+            return Response({"message": f"Unsupported format {file_format}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = importer.run(read_rows(stream, file_format))
+        logger.info(f"User with ID {user_profile.id} imported {report['created']} products, {report['failed']} rows failed.")
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class StoreList(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        stores = Store.objects.filter(deleted_at__isnull=True).order_by('id')
+        serializer = StoreSerializer(stores, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        request_body=StoreSerializer,
+    )
+    def post(self, request):
+        try:
+            user_profile = get_user_profile(request)
+        except UserProfile.DoesNotExist:
+            return Response({"message": "User profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not user_profile.is_admin:
+            logger.warning(f"User with ID {user_profile.id} attempted to create a store without permission.")
+            return Response({"Permission Denied": "You don't have permission to create a store."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        serializer = StoreSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save(owner=user_profile)
+        logger.info(f"User with ID {user_profile.id} created store {serializer.data['id']}.")
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class StoreDetail(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    def get_own_store(self, request, _id):
+        try:
+            user_profile = get_user_profile(request)
+        except UserProfile.DoesNotExist:
+            raise Http404
+        return get_object_or_404(Store, id=_id, owner=user_profile, deleted_at__isnull=True)
+
+    def get(self, request, _id):
+        store = get_object_or_404(Store, id=_id, deleted_at__isnull=True)
+        return Response(StoreSerializer(store).data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ],
+        request_body=StoreSerializer,
+    )
+    def put(self, request, _id):
+        store = self.get_own_store(request, _id)
+        serializer = StoreSerializer(store, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
+                              type=openapi.TYPE_STRING),
+        ], )
+    def delete(self, request, _id):
+        store = self.get_own_store(request, _id)
+        with transaction.atomic():
+            store.deleted_at = timezone.now()
+            store.save(update_fields=['deleted_at'])
+            store.products.filter(is_deleted=False).update(is_deleted=True, updated_at=store.deleted_at)
+            invalidate_product_listings(store.id)
+
+        logger.info(f"Store with ID {_id} marked as deleted.")
+        return Response({"message": "The store has been successfully removed"}, status=status.HTTP_200_OK)
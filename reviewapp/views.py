@@ -9,7 +9,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
-from utils.tokens import get_user_id_from_token
+from utils.tokens import get_user_profile
 
 from orderapp.models import (Order,
                              OrderDetails
@@ -30,8 +30,7 @@ class ReviewDetail(APIView):
         security=[],
     )
     def get_object(self, request, _id):
-        user_id = get_user_id_from_token(request)
-        user_profile = UserProfile.objects.get(id=user_id)
+        user_profile = get_user_profile(request)
         return get_object_or_404(Review, id=_id, is_deleted=False)
 
     @swagger_auto_schema(
@@ -153,8 +152,7 @@ class ReviewList(APIView):
     )
     def post(self, request, product_id):
         try:
-            user_id = get_user_id_from_token(request)
-            user_profile = UserProfile.objects.get(id=user_id)
+            user_profile = get_user_profile(request)
             product = Product.objects.get(id=product_id)
 
             # ,         
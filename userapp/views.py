@@ -1,8 +1,7 @@
-from utils.tokens import get_user_id_from_token
-from django.shortcuts import get_object_or_404
+from utils.tokens import get_user_profile
 from rest_framework import permissions
 from drf_yasg import openapi
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from utils.authentication import ProfileJWTAuthentication
 import logging
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -47,12 +46,9 @@ class UserProfileList(APIView):
 
 
 class UserProfileDetails(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ProfileJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_user(self, _id):
-        return get_object_or_404(UserProfile, id=_id)
-
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description="Bearer <token>",
@@ -61,12 +57,11 @@ class UserProfileDetails(APIView):
         security=[],
     )
     def get(self, request):
-        user_id = get_user_id_from_token(request)
         try:
-            user = self.get_user(user_id)
-            logger.info(f"User with ID {user_id} retrieved successfully.")
+            user = get_user_profile(request)
+            logger.info(f"User with ID {request.user.id} retrieved successfully.")
         except UserProfile.DoesNotExist:
-            logger.warning(f"Failed to retrieve user. User with ID {user_id} not found.")
+            logger.warning(f"Failed to retrieve user. User with ID {request.user.id} not found.")
             return Response({"message": "User Not Found"}, status=404)
 
         serializer = UserProfileSerializer(user, many=False)
@@ -87,12 +82,11 @@ class UserProfileDetails(APIView):
         security=[],
     )
     def put(self, request):
-        user_id = get_user_id_from_token(request)
         try:
-            user = self.get_user(user_id)
-            logger.info(f"Attempting to update user with ID {user_id}.")
+            user = get_user_profile(request)
+            logger.info(f"Attempting to update user with ID {request.user.id}.")
         except UserProfile.DoesNotExist:
-            logger.warning(f"Failed to update user. User with ID {user_id} not found.")
+            logger.warning(f"Failed to update user. User with ID {request.user.id} not found.")
             return Response({"message": "User Not Found."}, status=404)
 
         serializer = UserProfileSerializer(user, data=request.data, partial=True)
@@ -100,7 +94,7 @@ class UserProfileDetails(APIView):
             return Response({"message": "Changing password, is_superuser is not allowed."}, status=403)
         if serializer.is_valid():
             serializer.save()
-            logger.info(f"User with ID {user_id} updated successfully.")
+            logger.info(f"User with ID {request.user.id} updated successfully.")
             return Response(serializer.data, status=200)
-        logger.error(f"Failed to update user with ID {user_id}: {serializer.errors}")
+        logger.error(f"Failed to update user with ID {request.user.id}: {serializer.errors}")
         return Response(serializer.errors, status=401)
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from userapp.models import UserProfile
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the token's user as a UserProfile in the one query DRF
+    makes anyway, so ``request.user`` is the profile and views get it from
+    ``utils.tokens.get_user_profile`` instead of decoding the token and fetching it again.
+    Users without a profile (superusers created with createsuperuser) stay plain Users.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_model = UserProfile
+
+    def get_user(self, validated_token):
+        try:
+            return super().get_user(validated_token)
+        except AuthenticationFailed as e:
+            if e.detail.get('code') != 'user_not_found':
+                raise
+        return JWTAuthentication().get_user(validated_token)
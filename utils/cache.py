@@ -0,0 +1,28 @@
+import time
+
+from django.core.cache import caches
+
+
+def shared_cache():
+    return caches['shared']
+
+
+def get_generation(name):
+    """Current value of a cross-worker generation counter kept in the shared cache."""
+    cache = shared_cache()
+    generation = cache.get(name)
+    if generation is None:
+        # Seeded from the clock so a counter lost from the cache never comes back with an old value.
+        cache.add(name, time.time_ns(), timeout=None)
+        generation = cache.get(name)
+    return generation
+
+
+def bump_generation(name):
+    cache = shared_cache()
+    try:
+        return cache.incr(name)
+    except ValueError:
+        generation = time.time_ns()
+        cache.set(name, generation, timeout=None)
+        return generation
@@ -0,0 +1,35 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Weak ETag of ``parts``: version stamps (ids, updated_at, counters) or an already cached body."""
+    digest = hashlib.md5(json.dumps(parts, cls=DjangoJSONEncoder).encode()).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """
+    Returns a 304 if the client's If-None-Match / If-Modified-Since already match the given
+    validators and ``None`` otherwise, so the view can skip loading and serializing the body.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,74 @@
+"""
+Per-worker copies of small reference tables (order statuses, categories).
+
+Each table is loaded once per worker and served from memory. Every write to it bumps a
+version counter in the shared cache, and workers compare their copy's version with it at
+most every REFERENCE_CACHE_CHECK_INTERVAL seconds, so other gunicorn workers pick up a
+change within that interval and the writing worker immediately.
+"""
+import threading
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from utils.cache import bump_generation, get_generation
+
+
+class ReferenceCache:
+    def __init__(self, model_label):
+        self.model_label = model_label
+        self.version_key = f'reference:{model_label.lower()}'
+        self._lock = threading.Lock()
+        self._rows = None
+        self._version = None
+        self._checked_at = 0
+        post_save.connect(self._changed, sender=model_label, weak=False)
+        post_delete.connect(self._changed, sender=model_label, weak=False)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def all(self):
+        """Every row ordered by id. The instances are shared, don't modify them."""
+        now = time.monotonic()
+        if self._rows is None or now - self._checked_at >= settings.REFERENCE_CACHE_CHECK_INTERVAL:
+            # Read the version before the rows: a write in between only causes one extra reload.
+            version = get_generation(self.version_key)
+            with self._lock:
+                if self._rows is None or version != self._version:
+                    self._rows = list(self.model.objects.order_by('id'))
+                    self._version = version
+                self._checked_at = now
+        return self._rows
+
+    @property
+    def version(self):
+        self.all()
+        return self._version
+
+    def get(self, **lookup):
+        for row in self.all():
+            if all(getattr(row, field) == value for field, value in lookup.items()):
+                return row
+        raise self.model.DoesNotExist(f"{self.model_label} matching {lookup} does not exist.")
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+        bump_generation(self.version_key)
+
+    def _changed(self, **kwargs):
+        transaction.on_commit(self.invalidate)
+
+
+order_statuses = ReferenceCache('orderapp.OrderStatus')
+categories = ReferenceCache('categoryapp.Category')
+
+
+def get_order_status(code):
+    """Order status by its code ("created", "paid", ...)."""
+    return order_statuses.get(code=code)
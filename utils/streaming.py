@@ -0,0 +1,61 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def json_array_lines(items):
+    yield '['
+    for index, item in enumerate(items):
+        yield (',' if index else '') + json.dumps(item, cls=DjangoJSONEncoder)
+    yield ']'
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield json.dumps(item, cls=DjangoJSONEncoder) + '\n'
+
+
+def streaming_json_response(items, stream_format, filename=None):
+    """Streams ``items`` as one JSON array or as JSON Lines without building the body in memory."""
+    lines = ndjson_lines(items) if stream_format == 'ndjson' else json_array_lines(items)
+    response = StreamingHttpResponse(lines, content_type=STREAM_FORMATS[stream_format])
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def streaming_csv_response(header, rows, filename=None):
+    """Streams ``rows`` (sequences matching ``header``) as CSV, one line at a time."""
+    writer = csv.writer(_Echo())
+    lines = (writer.writerow(row) for row in _with_header(header, rows))
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
@@ -1,8 +1,16 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.tokens import AccessToken
 
+from userapp.models import UserProfile
 
-def get_user_id_from_token(request):
+
+def _authenticated_by_token(request):
+    # Only a user DRF authenticated from the token counts, a session user may be someone else.
+    return isinstance(getattr(request, 'successful_authenticator', None), JWTAuthentication)
+
+
+def _decode_user_id(request):
     try:
         authorization_header = request.headers.get('Authorization')
         if authorization_header:
@@ -13,3 +21,30 @@ def get_user_id_from_token(request):
             return None
     except (AuthenticationFailed, IndexError):
         return None
+
+
+def get_user_id_from_token(request):
+    """
+    ID of the user in the request's Bearer token, or None. Taken from ``request.user`` when
+    DRF authenticated the token, otherwise the token is decoded once per request.
+    """
+    if _authenticated_by_token(request):
+        return request.user.id
+    if not hasattr(request, '_token_user_id'):
+        request._token_user_id = _decode_user_id(request)
+    return request._token_user_id
+
+
+def get_user_profile(request):
+    """
+    UserProfile of the token's user, loaded at most once per request (it is ``request.user``
+    under ProfileJWTAuthentication). Raises UserProfile.DoesNotExist like
+    ``UserProfile.objects.get``.
+    """
+    if _authenticated_by_token(request) and isinstance(request.user, UserProfile):
+        return request.user
+    if not hasattr(request, '_user_profile'):
+        request._user_profile = UserProfile.objects.filter(id=get_user_id_from_token(request)).first()
+    if request._user_profile is None:
+        raise UserProfile.DoesNotExist("UserProfile matching query does not exist.")
+    return request._user_profile